@@ -1,4 +1,55 @@
-from .polyskel import skeletonize
-from .shapely_polyskel import StraightSkeleton
+from typing import TYPE_CHECKING
 
-__all__ = ["StraightSkeleton", "skeletonize"]
+from .polyskel import (
+    RoofMesh,
+    SeedCache,
+    SkeletonBudgetExceeded,
+    SkeletonCorrupted,
+    canonicalize,
+    fingerprint,
+    roof_mesh,
+    skeletonize,
+)
+
+if TYPE_CHECKING:
+    from .graph import SkeletonGraph
+    from .shapely_polyskel import StraightSkeleton
+    from .tiled import tiled_skeleton, write_tiled_skeleton
+
+# Loaded on first access, so that the core skeletonizer imports without
+# shapely and numpy
+_LAZY = {
+    "SkeletonGraph": ".graph",
+    "StraightSkeleton": ".shapely_polyskel",
+    "tiled_skeleton": ".tiled",
+    "write_tiled_skeleton": ".tiled",
+}
+
+__all__ = [
+    "RoofMesh",
+    "SeedCache",
+    "SkeletonBudgetExceeded",
+    "SkeletonCorrupted",
+    "SkeletonGraph",
+    "StraightSkeleton",
+    "canonicalize",
+    "fingerprint",
+    "roof_mesh",
+    "skeletonize",
+    "tiled_skeleton",
+    "write_tiled_skeleton",
+]
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY:
+        from importlib import import_module
+
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,224 @@
+"""
+Graph representation of a straight skeleton, e.g. for routing networks built
+from the centrelines of road polygons and corridors.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .polyskel import Subtree
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+@dataclass
+class SkeletonGraph:
+    """Skeleton graph
+
+    Attributes:
+        nodes (np.ndarray): Node coordinates, shape (n, 2).
+        heights (np.ndarray): Node heights, shape (n,).
+        edges (np.ndarray): Node indices of the (undirected) edges, shape
+            (m, 2).
+        lengths (np.ndarray): Edge lengths, shape (m,). Merged chains keep
+            their length along the chain.
+    """
+
+    nodes: np.ndarray
+    heights: np.ndarray
+    edges: np.ndarray
+    lengths: np.ndarray
+
+    @classmethod
+    def from_skeleton(
+        cls, skeleton: list[Subtree], sinks: bool = False
+    ) -> "SkeletonGraph":
+        """Builds the graph of a straight skeleton.
+
+        Args:
+            skeleton (list[Subtree]): Straight skeleton (polyskel).
+            sinks (bool, optional): If True the edges to the polygon vertices
+                are included, otherwise only the ridges between sources.
+                Defaults to False.
+
+        Returns:
+            SkeletonGraph: Skeleton graph.
+        """
+        index = {}
+        coords = []
+        heights = []
+        for subtree in skeleton:
+            key = (subtree.source.x, subtree.source.y)
+            if key not in index:
+                index[key] = len(coords)
+                coords.append(key)
+                heights.append(subtree.height)
+
+        edges = []
+        for subtree in skeleton:
+            source = index[(subtree.source.x, subtree.source.y)]
+            for sink in subtree.sinks:
+                key = (sink.x, sink.y)
+                if key not in index:
+                    if not sinks:
+                        continue
+                    index[key] = len(coords)
+                    coords.append(key)
+                    heights.append(0.0)
+                if index[key] != source:
+                    edges.append((source, index[key]))
+
+        nodes = np.array(coords, dtype=float).reshape(-1, 2)
+        edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        edges = np.unique(np.sort(edges, axis=1), axis=0)
+        lengths = np.linalg.norm(
+            nodes[edges[:, 0]] - nodes[edges[:, 1]], axis=1
+        )
+        return cls(nodes, np.array(heights, dtype=float), edges, lengths)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def degrees(self) -> np.ndarray:
+        """Returns the degree of every node."""
+        return np.bincount(self.edges.ravel(), minlength=len(self.nodes))
+
+    def csr(self) -> tuple[np.ndarray, np.ndarray]:
+        """Adjacency in compressed sparse row form.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: indptr and indices. The neighbours
+                of node i are indices[indptr[i] : indptr[i + 1]].
+        """
+        indptr, indices, _ = self._adjacency()
+        return indptr, indices
+
+    def _adjacency(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        heads = np.concatenate((self.edges[:, 0], self.edges[:, 1]))
+        tails = np.concatenate((self.edges[:, 1], self.edges[:, 0]))
+        edge_ids = np.tile(np.arange(len(self.edges)), 2)
+        order = np.argsort(heads, kind="stable")
+        indptr = np.zeros(len(self.nodes) + 1, dtype=np.intp)
+        np.cumsum(np.bincount(heads, minlength=len(self.nodes)), out=indptr[1:])
+        return indptr, tails[order], edge_ids[order]
+
+    def _subgraph(self, edge_mask: np.ndarray) -> "SkeletonGraph":
+        """Keeps the selected edges and the nodes they connect."""
+        edges = self.edges[edge_mask]
+        used = np.zeros(len(self.nodes), dtype=bool)
+        used[edges.ravel()] = True
+        remap = np.cumsum(used) - 1
+        return SkeletonGraph(
+            self.nodes[used],
+            self.heights[used],
+            remap[edges].reshape(-1, 2),
+            self.lengths[edge_mask],
+        )
+
+    def merge_chains(self) -> "SkeletonGraph":
+        """Merges chains of degree-2 nodes into single edges.
+
+        Returns:
+            SkeletonGraph: Graph without degree-2 nodes (except on cycles made
+                of degree-2 nodes only).
+        """
+        degrees = self.degrees()
+        indptr, indices, edge_ids = self._adjacency()
+        visited = np.zeros(len(self.edges), dtype=bool)
+        edges = []
+        lengths = []
+        for start in np.flatnonzero(degrees != 2):
+            for k in range(indptr[start], indptr[start + 1]):
+                edge = edge_ids[k]
+                if visited[edge]:
+                    continue
+                visited[edge] = True
+                length = self.lengths[edge]
+                node = indices[k]
+                while degrees[node] == 2:
+                    k = indptr[node]
+                    if edge_ids[k] == edge:
+                        k += 1
+                    edge = edge_ids[k]
+                    visited[edge] = True
+                    length += self.lengths[edge]
+                    node = indices[k]
+                edges.append((start, node))
+                lengths.append(length)
+
+        graph = SkeletonGraph(
+            self.nodes,
+            self.heights,
+            np.concatenate(
+                (
+                    np.array(edges, dtype=np.intp).reshape(-1, 2),
+                    self.edges[~visited],
+                )
+            ),
+            np.concatenate(
+                (np.array(lengths, dtype=float), self.lengths[~visited])
+            ),
+        )
+        return graph._subgraph(np.ones(len(graph.edges), dtype=bool))
+
+    def prune(
+        self, min_length: float = 0.0, min_height: float = 0.0
+    ) -> "SkeletonGraph":
+        """Removes spur branches.
+
+        A spur is a chain from a leaf node to a branching node. Spurs shorter
+        than min_length, or ending in a leaf lower than min_height, are
+        removed, repeatedly until none is left. Degree-2 chains are merged.
+        A branching node whose branches are all spurs keeps its longest spur,
+        so that a graph is never pruned away.
+
+        Args:
+            min_length (float, optional): Minimum spur length. Defaults to 0.
+            min_height (float, optional): Minimum leaf height. Defaults to 0.
+
+        Returns:
+            SkeletonGraph: Pruned graph.
+        """
+        graph = self.merge_chains()
+        while len(graph.edges) > 1:
+            degrees = graph.degrees()
+            leaf_a = degrees[graph.edges[:, 0]] == 1
+            leaf_b = degrees[graph.edges[:, 1]] == 1
+            # a single edge between two leaves is not a spur
+            spur = leaf_a ^ leaf_b
+            leaves = np.where(leaf_a, graph.edges[:, 0], graph.edges[:, 1])
+            remove = spur & (
+                (graph.lengths < min_length)
+                | (graph.heights[leaves] < min_height)
+            )
+            # star: a branching node with spurs only, keep the longest
+            centers = np.where(leaf_a, graph.edges[:, 1], graph.edges[:, 0])
+            spurs = np.bincount(centers[spur], minlength=len(degrees))
+            for center in np.flatnonzero((spurs == degrees) & (degrees > 1)):
+                branches = np.flatnonzero(spur & (centers == center))
+                remove[branches[np.argmax(graph.lengths[branches])]] = False
+            if not remove.any():
+                break
+            graph = graph._subgraph(~remove).merge_chains()
+        return graph
+
+    def to_networkx(self) -> "nx.Graph":
+        """Converts the graph to networkx (optional dependency).
+
+        Returns:
+            nx.Graph: Graph with x, y and height node attributes and length
+                edge attributes.
+        """
+        import networkx as nx
+
+        graph = nx.Graph()
+        for i, ((x, y), height) in enumerate(
+            zip(self.nodes, self.heights, strict=True)
+        ):
+            graph.add_node(i, x=float(x), y=float(y), height=float(height))
+        for (a, b), length in zip(self.edges, self.lengths, strict=True):
+            graph.add_edge(int(a), int(b), length=float(length))
+        return graph
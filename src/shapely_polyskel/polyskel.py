@@ -3,13 +3,28 @@ Implementation of the straight skeleton algorithm as described by Felkel and
 Obdržálek in their 1998 conference paper Straight skeleton implementation.
 """
 
+import hashlib
 import heapq
-from dataclasses import dataclass
+import math
+import os
+import struct
+import sys
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
 from itertools import chain, cycle, islice, tee
 
 from euclid3 import Line2, LineSegment2, Point2, Ray2, Vector2, operator
 
+from .predicates import cross, orient2d, side
+
 EPSILON = 0.00001
+# tolerance of point equality tests, relative to the extent of the input
+RELATIVE_TOLERANCE = 0.001
+# hole edges are indexed for the split event scan from this number on
+MIN_INDEXED_HOLE_EDGES = 32
+# hole edges whose ends move faster than this (sharp corners) aren't indexed
+_MAX_INDEXED_SPEED = 10.0
 
 
 def _window(lst: list[Point2]):
@@ -20,11 +35,22 @@ def _window(lst: list[Point2]):
 
 
 def _cross(a: Vector2, b: Vector2) -> float:
-    return a.x * b.y - b.x * a.y
+    return cross(a.x, a.y, b.x, b.y)
+
+
+def _approximately_equals(a: Point2, b: Point2, tolerance: float) -> bool:
+    return a == b or abs(a - b) <= tolerance
+
+
+def _speed(direction: Vector2, edge: Vector2) -> float:
+    """Speed of a wavefront vertex moving along direction, for a unit
+    offset of the edge."""
+    sine = abs(_cross(direction, edge)) / (abs(direction) * abs(edge))
+    return 1 / sine if sine > 0 else math.inf
 
 
-def _approximately_equals(a: Point2, b: Point2) -> bool:
-    return a == b or (abs(a - b) <= max(abs(a), abs(b)) * 0.001)
+def _segment_key(edge: LineSegment2) -> tuple[float, float, float, float]:
+    return (edge.p.x, edge.p.y, edge.v.x, edge.v.y)
 
 
 # TODO Function not used
@@ -61,6 +87,35 @@ class Subtree:
     sinks: list[Point2]
 
 
+class SkeletonBudgetExceeded(RuntimeError):
+    """
+    Raised when the computation of a skeleton exceeds one of its budgets.
+
+    The skeleton attribute holds the subtrees computed before the budget ran
+    out, and reason names the exceeded budget ("max_events", "timeout" or
+    "max_queue_size").
+    """
+
+    def __init__(self, reason: str, skeleton: list[Subtree]) -> None:
+        super().__init__(f"The skeleton computation exceeded its {reason}.")
+        self.reason = reason
+        self.skeleton = skeleton
+
+
+class SkeletonCorrupted(RuntimeError):
+    """
+    Raised when an event leaves a wavefront loop that doesn't close, which
+    would otherwise loop forever. This is a defect of the computation, not a
+    budget, so it isn't caught by the fallback of StraightSkeleton.
+
+    The skeleton attribute holds the subtrees computed before.
+    """
+
+    def __init__(self, skeleton: list[Subtree]) -> None:
+        super().__init__("A wavefront loop of the skeleton doesn't close.")
+        self.skeleton = skeleton
+
+
 class _LAVertex:
     def __init__(
         self,
@@ -77,6 +132,8 @@ class _LAVertex:
         self.lav = None
         # TODO this might be handled better. Maybe membership in lav implies validity?
         self._valid = True
+        # the vertex that took the place of this one in an edge event
+        self.replacement = None
 
         creator_vectors = (
             edge_left.v.normalized() * -1,
@@ -86,9 +143,13 @@ class _LAVertex:
             direction_vectors = creator_vectors
 
         self._is_reflex = (_cross(*direction_vectors)) < 0
+        direction = operator.add(*creator_vectors)
+        if abs(direction) <= EPSILON:
+            # collinear edges, e.g. reconnected by a vertex event: the vertex
+            # moves along their normal, the interior is on their right
+            direction = Vector2(edge_left.v.y, -edge_left.v.x).normalized()
         self._bisector = Ray2(
-            self.point,
-            operator.add(*creator_vectors) * (-1 if self.is_reflex else 1),
+            self.point, direction * (-1 if self.is_reflex else 1)
         )
 
     @property
@@ -99,44 +160,68 @@ class _LAVertex:
     def is_reflex(self) -> bool:
         return self._is_reflex
 
+    def is_collapsed(self, tolerance: float) -> bool:
+        """
+        Whether the wavefronts of the edges of the vertex lie on each other,
+        i.e. the edges are antiparallel and a split event brought them
+        together. The vertex then slides along them until it meets a
+        neighbour.
+        """
+        left = self.edge_left.v.normalized()
+        right = self.edge_right.v.normalized()
+        if abs(_cross(left, right)) > EPSILON or left.dot(right) >= 0:
+            return False
+        line = Line2(self.edge_left)
+        height = line.distance(self.point)
+        return line.distance(self.edge_right.p) <= 2 * height + tolerance
+
     @property
     def original_edges(self):
         return self.lav._slav._original_edges
 
-    def next_event(self):
+    def split_events(self, edges: list) -> list:
+        """
+        Returns the candidate split events of the vertex against the given
+        original edges.
+        """
+        # split events happen when a vertex hits an opposite edge, splitting the polygon in two.
         events = []
-        if self.is_reflex:
-            # a reflex vertex may generate a split event
-            # split events happen when a vertex hits an opposite edge, splitting the polygon in two.
-            for edge in self.original_edges:
-                if edge.edge == self.edge_left or edge.edge == self.edge_right:
-                    continue
+        # euclid3 segments compare by identity, the original edges are copies
+        own = (_segment_key(self.edge_left), _segment_key(self.edge_right))
+        for edge in edges:
+            if _segment_key(edge.edge) in own:
+                continue
 
-                # a potential b is at the intersection of between our own bisector and the bisector of the
-                # angle between the tested edge and any one of our own edges.
+            # a potential b is at the intersection of between our own bisector and the bisector of the
+            # angle between the tested edge and any one of our own edges.
 
-                # we choose the "less parallel" edge (in order to exclude a potentially parallel edge)
-                leftdot = abs(
-                    self.edge_left.v.normalized().dot(edge.edge.v.normalized())
-                )
-                rightdot = abs(
-                    self.edge_right.v.normalized().dot(edge.edge.v.normalized())
-                )
-                selfedge = (
-                    self.edge_left if leftdot < rightdot else self.edge_right
-                )
-                otheredge = (
-                    self.edge_left if leftdot > rightdot else self.edge_right
-                )
-
-                i = Line2(selfedge).intersect(Line2(edge.edge))
-                if i is not None and not _approximately_equals(i, self.point):
-                    # locate candidate b
-                    linvec = (self.point - i).normalized()
-                    edvec = edge.edge.v.normalized()
-                    if linvec.dot(edvec) < 0:
-                        edvec = -edvec
+            # we choose the "less parallel" edge (in order to exclude a potentially parallel edge)
+            leftdot = abs(
+                self.edge_left.v.normalized().dot(edge.edge.v.normalized())
+            )
+            rightdot = abs(
+                self.edge_right.v.normalized().dot(edge.edge.v.normalized())
+            )
+            selfedge = self.edge_left if leftdot < rightdot else self.edge_right
+            otheredge = (
+                self.edge_left if leftdot > rightdot else self.edge_right
+            )
 
+            i = Line2(selfedge).intersect(Line2(edge.edge))
+            if i is not None and not _approximately_equals(
+                i, self.point, self.lav._slav.tolerance
+            ):
+                # locate candidate b
+                linvec = (self.point - i).normalized()
+                edvec = edge.edge.v.normalized()
+                if linvec.dot(edvec) < 0:
+                    edvec = -edvec
+                # the side of a perpendicular edge is ambiguous, both are tried
+                edvecs = [edvec]
+                if abs(linvec.dot(edvec)) <= EPSILON:
+                    edvecs.append(-edvec)
+
+                for edvec in edvecs:
                     bisecvec = edvec + linvec
                     if abs(bisecvec) == 0:
                         continue
@@ -147,28 +232,27 @@ class _LAVertex:
                         continue
 
                     # check eligibility of b
-                    # a valid b should lie within the area limited by the edge and the bisectors of its two vertices:
+                    # a valid b should lie within the area limited by the edge
+                    # and the bisectors of its two vertices:
                     xleft = (
-                        _cross(
-                            edge.bisector_left.v.normalized(),
-                            (b - edge.bisector_left.p).normalized(),
+                        side(
+                            edge.bisector_left.p,
+                            edge.bisector_left.v,
+                            b,
+                            EPSILON,
                         )
-                        > -EPSILON
+                        >= 0
                     )
                     xright = (
-                        _cross(
-                            edge.bisector_right.v.normalized(),
-                            (b - edge.bisector_right.p).normalized(),
-                        )
-                        < EPSILON
-                    )
-                    xedge = (
-                        _cross(
-                            edge.edge.v.normalized(),
-                            (b - edge.edge.p).normalized(),
+                        side(
+                            edge.bisector_right.p,
+                            edge.bisector_right.v,
+                            b,
+                            EPSILON,
                         )
-                        < EPSILON
+                        <= 0
                     )
+                    xedge = side(edge.edge.p, edge.edge.v, b, EPSILON) <= 0
 
                     if not (xleft and xright and xedge):
                         continue
@@ -178,7 +262,10 @@ class _LAVertex:
                             Line2(edge.edge).distance(b), b, self, edge.edge
                         )
                     )
+        return events
 
+    def edge_events(self) -> list:
+        events = []
         i_prev = self.bisector.intersect(self.prev.bisector)
         i_next = self.bisector.intersect(self.next.bisector)
 
@@ -200,7 +287,9 @@ class _LAVertex:
                     self.next,
                 )
             )
+        return events
 
+    def closest_event(self, events: list) -> "_EdgeEvent | _SplitEvent | None":
         if not events:
             return None
 
@@ -211,6 +300,16 @@ class _LAVertex:
 
         return ev
 
+    def next_event(self):
+        events = []
+        if self.is_reflex:
+            # a reflex vertex may generate a split event
+            events.extend(
+                self.split_events(self.lav._slav.split_candidates(self))
+            )
+        events.extend(self.edge_events())
+        return self.closest_event(events)
+
     def invalidate(self):
         if self.lav is not None:
             self.lav.invalidate(self)
@@ -270,6 +369,15 @@ class _SLAV:
         contours = [_normalize_contour(polygon)]
         contours.extend([_normalize_contour(hole) for hole in holes])
 
+        # tolerances scale with the extent of the input, so that the same
+        # tests behave alike on small drawings and on projected coordinates
+        xs = [point.x for point in chain.from_iterable(contours)]
+        ys = [point.y for point in chain.from_iterable(contours)]
+        self.extent = (
+            max(max(xs) - min(xs), max(ys) - min(ys)) if xs else 0.0
+        ) or 1.0
+        self.tolerance = self.extent * RELATIVE_TOLERANCE
+
         self._lavs = [_LAV.from_polygon(contour, self) for contour in contours]
 
         # store original polygon edges for calculating split events
@@ -281,6 +389,45 @@ class _SLAV:
             )
             for vertex in chain.from_iterable(self._lavs)
         ]
+        # skeleton nodes on the face of each original edge, see track_faces
+        self._faces = None
+
+        outer_edges = len(self._lavs[0]) if self._lavs else 0
+        self._hole_index = None
+        if len(self._original_edges) - outer_edges >= MIN_INDEXED_HOLE_EDGES:
+            self._hole_index = _HoleIndex(
+                self._original_edges, outer_edges, self.tolerance
+            )
+
+    def split_candidates(self, vertex: "_LAVertex") -> list:
+        """
+        Returns the original edges the vertex may hit in a split event. Hole
+        edges out of its reach are skipped, see _HoleIndex.
+        """
+        if self._hole_index is None:
+            return self._original_edges
+        return self._hole_index.candidates(vertex)
+
+    def track_faces(self) -> None:
+        """
+        Records, for every original edge, the event points on the boundary of
+        its face (the area swept by the edge's wavefront).
+        """
+        self._face_indices = {
+            _segment_key(edge.edge): i
+            for i, edge in enumerate(self._original_edges)
+        }
+        self._face_ends = [
+            (vertex.prev.point, vertex.point)
+            for vertex in chain.from_iterable(self._lavs)
+        ]
+        self._faces = [[] for _ in self._original_edges]
+
+    def _record(self, point: Point2, *edges: LineSegment2) -> None:
+        if self._faces is None:
+            return
+        for edge in edges:
+            self._faces[self._face_indices[_segment_key(edge)]].append(point)
 
     def __iter__(self):
         yield from self._lavs
@@ -292,14 +439,23 @@ class _SLAV:
         return len(self._lavs) == 0
 
     def handle_edge_event(self, event):
+        """
+        Returns the subtree of the event and the new vertices, whose next
+        events are yet to be computed.
+        """
         sinks = []
-        events = []
+        vertices = []
 
         lav = event.vertex_a.lav
         if event.vertex_a.prev == event.vertex_b.next:
             self._lavs.remove(lav)
             for vertex in list(lav):
                 sinks.append(vertex.point)
+                self._record(
+                    event.intersection_point,
+                    vertex.edge_left,
+                    vertex.edge_right,
+                )
                 vertex.invalidate()
         else:
             new_vertex = lav.unify(
@@ -308,16 +464,24 @@ class _SLAV:
             if lav.head in (event.vertex_a, event.vertex_b):
                 lav.head = new_vertex
             sinks.extend((event.vertex_a.point, event.vertex_b.point))
-            next_event = new_vertex.next_event()
-            if next_event is not None:
-                events.append(next_event)
+            vertices.append(new_vertex)
+            self._record(
+                event.intersection_point,
+                event.vertex_a.edge_left,
+                event.vertex_a.edge_right,
+                event.vertex_b.edge_right,
+            )
 
         return (
             Subtree(event.intersection_point, event.distance, sinks),
-            events,
+            vertices,
         )
 
     def handle_split_event(self, event):
+        """
+        Returns the subtree of the event and the new vertices, whose next
+        events are yet to be computed.
+        """
         lav = event.vertex.lav
 
         sinks = [event.vertex.point]
@@ -340,20 +504,17 @@ class _SLAV:
                 x = y.next
 
             if x:
-                xleft = (
-                    _cross(
-                        y.bisector.v.normalized(),
-                        (event.intersection_point - y.point).normalized(),
-                    )
-                    >= -EPSILON
-                )
-                xright = (
-                    _cross(
-                        x.bisector.v.normalized(),
-                        (event.intersection_point - x.point).normalized(),
-                    )
-                    <= EPSILON
-                )
+                point = event.intersection_point
+                # a collapsed vertex slides along the edge, the side of its
+                # bisector doesn't bound the edge
+                if _slides_along(y, norm):
+                    xleft = (point - y.point).dot(norm) >= -EPSILON
+                else:
+                    xleft = side(y.point, y.bisector.v, point, EPSILON) >= 0
+                if _slides_along(x, norm):
+                    xright = (point - x.point).dot(norm) <= EPSILON
+                else:
+                    xright = side(x.point, x.bisector.v, point, EPSILON) <= 0
 
                 if xleft and xright:
                     break
@@ -385,36 +546,100 @@ class _SLAV:
         event.vertex.next.prev = v2
         y.next = v2
 
+        # a corrupted chain must not loop forever, it holds at most the live
+        # vertices and the two new ones
+        limit = sum(map(len, self._lavs)) + 2
         new_lavs = None
         self._lavs.remove(lav)
         if lav != x.lav:
             # the split event actually merges two lavs
             self._lavs.remove(x.lav)
-            new_lavs = [_LAV.from_chain(v1, self)]
+            new_lavs = [_LAV.from_chain(v1, self, limit)]
         else:
-            new_lavs = [_LAV.from_chain(v1, self), _LAV.from_chain(v2, self)]
+            new_lavs = [
+                _LAV.from_chain(v1, self, limit),
+                _LAV.from_chain(v2, self, limit),
+            ]
 
         for l in new_lavs:
             if len(l) > 2:
                 self._lavs.append(l)
-                vertices.append(l.head)
+                # both new vertices of merged LAVs need their next event
+                vertices.extend(v for v in (v1, v2) if v.lav is l)
             else:
                 sinks.append(l.head.next.point)
                 for v in list(l):
+                    self._record(
+                        event.intersection_point, v.edge_left, v.edge_right
+                    )
                     v.invalidate()
 
-        events = []
-        for vertex in vertices:
-            next_event = vertex.next_event()
-            if next_event is not None:
-                events.append(next_event)
-
+        self._record(
+            event.intersection_point,
+            event.vertex.edge_left,
+            event.vertex.edge_right,
+            event.opposite_edge,
+        )
         event.vertex.invalidate()
         return (
             Subtree(event.intersection_point, event.distance, sinks),
-            events,
+            vertices,
         )
 
+    def handle_vertex_event(
+        self, event_a: _SplitEvent, event_b: _SplitEvent
+    ) -> tuple:
+        """
+        Handles two split events at the same point, where each reflex vertex
+        hits an edge of the other one. The vertices meet and the wavefront is
+        reconnected across them instead of being split twice. Returns the
+        subtree of the event and the new vertices, whose next events are yet
+        to be computed.
+        """
+        a = event_a.vertex
+        b = event_b.vertex
+        point = event_a.intersection_point
+        v1 = _LAVertex(point, a.edge_left, b.edge_right)
+        v2 = _LAVertex(point, b.edge_left, a.edge_right)
+
+        v1.prev = a.prev
+        v1.next = b.next
+        v2.prev = b.prev
+        v2.next = a.next
+        a.prev.next = v1
+        b.next.prev = v1
+        b.prev.next = v2
+        a.next.prev = v2
+
+        limit = sum(map(len, self._lavs)) + 2
+        self._lavs.remove(a.lav)
+        if a.lav is b.lav:
+            new_lavs = [
+                _LAV.from_chain(v1, self, limit),
+                _LAV.from_chain(v2, self, limit),
+            ]
+        else:
+            self._lavs.remove(b.lav)
+            new_lavs = [_LAV.from_chain(v1, self, limit)]
+
+        sinks = [a.point, b.point]
+        vertices = []
+        for lav in new_lavs:
+            if len(lav) > 2:
+                self._lavs.append(lav)
+                vertices.extend(v for v in (v1, v2) if v.lav is lav)
+            else:
+                sinks.append(lav.head.next.point)
+                for v in list(lav):
+                    self._record(point, v.edge_left, v.edge_right)
+                    v.invalidate()
+
+        self._record(point, a.edge_left, a.edge_right, b.edge_left)
+        self._record(point, b.edge_right)
+        a.invalidate()
+        b.invalidate()
+        return (Subtree(point, event_a.distance, sinks), vertices)
+
 
 class _LAV:
     def __init__(self, slav) -> None:
@@ -442,11 +667,19 @@ class _LAV:
         return lav
 
     @classmethod
-    def from_chain(cls, head, slav):
+    def from_chain(
+        cls, head: _LAVertex, slav: "_SLAV | None", limit: int
+    ) -> "_LAV":
+        """
+        Builds a LAV from a chain of vertices, raising SkeletonCorrupted if
+        the chain doesn't loop back to its head within limit vertices.
+        """
         lav = cls(slav)
         lav.head = head
         for vertex in lav:
             lav._len += 1
+            if lav._len > limit:
+                raise SkeletonCorrupted([])
             vertex.lav = lav
         return lav
 
@@ -481,6 +714,7 @@ class _LAV:
 
         vertex_a.invalidate()
         vertex_b.invalidate()
+        vertex_a.replacement = vertex_b.replacement = replacement
 
         self._len -= 1
         return replacement
@@ -529,6 +763,9 @@ class _EventQueue:
     def empty(self) -> bool:
         return len(self.__data) == 0
 
+    def __len__(self) -> int:
+        return len(self.__data)
+
     def peek(self):
         return self.__data[0]
 
@@ -537,29 +774,641 @@ class _EventQueue:
             print(item)
 
 
-def _merge_sources(skeleton: list[Subtree]) -> None:
+class _Budget:
+    def __init__(
+        self,
+        max_events: int | None,
+        timeout: float | None,
+        max_queue_size: int | None,
+    ) -> None:
+        self._max_events = max_events
+        self._deadline = (
+            None if timeout is None else time.perf_counter() + timeout
+        )
+        self._max_queue_size = max_queue_size
+        self._events = 0
+
+    def exceeded(self, queue_size: int) -> str | None:
+        """Counts a processed event and returns the name of the exceeded
+        budget, if any."""
+        self._events += 1
+        if self._max_events is not None and self._events > self._max_events:
+            return "max_events"
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            return "timeout"
+        if (
+            self._max_queue_size is not None
+            and queue_size > self._max_queue_size
+        ):
+            return "max_queue_size"
+        return None
+
+    def timed_out(self) -> bool:
+        """Returns whether the timeout ran out, without counting an event."""
+        return (
+            self._deadline is not None and time.perf_counter() > self._deadline
+        )
+
+    def wall_deadline(self) -> float | None:
+        """Returns the deadline as a time.time() value, comparable across
+        processes."""
+        if self._deadline is None:
+            return None
+        return time.time() + self._deadline - time.perf_counter()
+
+
+class _HoleIndex:
+    """
+    Grid of the hole edges for the split event scan.
+
+    No event happens above the horizon, an upper bound of the distance from
+    any point of the polygon to its boundary (the wavefront never gets closer
+    to the boundary than the time elapsed). A reflex vertex also can't split
+    an edge after its closest edge event. The vertex therefore only travels
+    along its bisector up to the lower of both heights, and an edge is only
+    hit in the area swept by its wavefront up to that height, which fits in a
+    box bounded by the bisectors of its ends. Hole edges whose box misses the
+    path of the vertex are skipped. The outer edges and the hole edges with a
+    very fast end are always scanned.
+    """
+
+    def __init__(
+        self, edges: list[_OriginalEdge], outer_edges: int, tolerance: float
+    ) -> None:
+        self._edges = edges
+        self._tolerance = tolerance
+        self._always = list(range(outer_edges))
+        # ends of the indexed edges and their displacements per unit height
+        self._reach = {}
+        self._max_speed = 0.0
+        for i in range(outer_edges, len(edges)):
+            edge = edges[i]
+            speed_left = _speed(edge.bisector_left.v, edge.edge.v)
+            speed_right = _speed(edge.bisector_right.v, edge.edge.v)
+            if max(speed_left, speed_right) > _MAX_INDEXED_SPEED:
+                self._always.append(i)
+                continue
+            self._max_speed = max(self._max_speed, speed_left, speed_right)
+            self._reach[i] = (
+                edge.edge.p1,
+                edge.edge.p2,
+                edge.bisector_left.v.normalized() * speed_left,
+                edge.bisector_right.v.normalized() * speed_right,
+            )
+
+        xs = [edge.edge.p1.x for edge in edges]
+        ys = [edge.edge.p1.y for edge in edges]
+        self._origin = (min(xs), min(ys))
+        self._size = (
+            max(max(xs) - min(xs), max(ys) - min(ys))
+            / math.ceil(math.sqrt(len(edges)))
+        ) or 1.0
+        self._shape = (self._cell(max(xs), 0) + 1, self._cell(max(ys), 1) + 1)
+        self.horizon = min(
+            min(max(xs) - min(xs), max(ys) - min(ys)) / 2, self._bound()
+        )
+
+        self._cells = {}
+        for i, (p1, p2, _, _) in self._reach.items():
+            for cell in self._range(
+                min(p1.x, p2.x),
+                min(p1.y, p2.y),
+                max(p1.x, p2.x),
+                max(p1.y, p2.y),
+            ):
+                self._cells.setdefault(cell, []).append(i)
+
+    def _cell(self, value: float, axis: int) -> int:
+        return math.floor((value - self._origin[axis]) / self._size)
+
+    def _range(
+        self, xmin: float, ymin: float, xmax: float, ymax: float
+    ) -> Iterator[tuple[int, int]]:
+        x0 = max(self._cell(xmin, 0), 0)
+        x1 = min(self._cell(xmax, 0), self._shape[0] - 1)
+        y0 = max(self._cell(ymin, 1), 0)
+        y1 = min(self._cell(ymax, 1), self._shape[1] - 1)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (x, y)
+
+    def _bound(self) -> float:
+        """
+        Upper bound of the distance from a point of the grid to the boundary:
+        the largest distance from a cell centre to the closest point sampled
+        along the edges, plus half the cell diagonal.
+        """
+        samples = {}
+        for edge in self._edges:
+            segment = edge.edge
+            steps = math.ceil(abs(segment.v) / self._size) + 1
+            for k in range(steps):
+                point = segment.p + segment.v * (k / steps)
+                cell = (self._cell(point.x, 0), self._cell(point.y, 1))
+                samples.setdefault(cell, []).append(point)
+
+        bound = 0.0
+        for x in range(self._shape[0]):
+            for y in range(self._shape[1]):
+                centre = Point2(
+                    self._origin[0] + (x + 0.5) * self._size,
+                    self._origin[1] + (y + 0.5) * self._size,
+                )
+                closest = math.inf
+                ring = 0
+                # points beyond the ring are at least ring cells away
+                while closest > ring * self._size:
+                    for dx in range(-ring, ring + 1):
+                        for dy in range(-ring, ring + 1):
+                            if max(abs(dx), abs(dy)) != ring:
+                                continue
+                            for point in samples.get((x + dx, y + dy), ()):
+                                closest = min(closest, abs(point - centre))
+                    ring += 1
+                bound = max(bound, closest)
+        return bound + self._size * math.sqrt(0.5)
+
+    def _reaches(self, i: int, height: float, box: tuple) -> bool:
+        p1, p2, d1, d2 = self._reach[i]
+        xs = (p1.x, p2.x, p1.x + d1.x * height, p2.x + d2.x * height)
+        ys = (p1.y, p2.y, p1.y + d1.y * height, p2.y + d2.y * height)
+        return not (
+            min(xs) - self._tolerance > box[2]
+            or max(xs) + self._tolerance < box[0]
+            or min(ys) - self._tolerance > box[3]
+            or max(ys) + self._tolerance < box[1]
+        )
+
+    def candidates(self, vertex: "_LAVertex") -> list[_OriginalEdge]:
+        # height and end of the travel of the vertex along its bisector
+        speed = _speed(vertex.bisector.v, vertex.edge_left.v)
+        limit = vertex.closest_event(vertex.edge_events())
+        if limit is not None and (
+            math.isinf(speed) or limit.distance < self.horizon
+        ):
+            height = limit.distance
+            end = limit.intersection_point
+        elif math.isinf(speed):
+            return self._edges
+        else:
+            height = self.horizon
+            travel = height - Line2(vertex.edge_left).distance(vertex.point)
+            end = vertex.point + vertex.bisector.v.normalized() * (
+                speed * max(travel, 0.0)
+            )
+
+        height += self._tolerance
+        box = (
+            min(vertex.point.x, end.x),
+            min(vertex.point.y, end.y),
+            max(vertex.point.x, end.x),
+            max(vertex.point.y, end.y),
+        )
+        margin = height * self._max_speed + self._tolerance
+        found = set()
+        for cell in self._range(
+            box[0] - margin, box[1] - margin, box[2] + margin, box[3] + margin
+        ):
+            found.update(self._cells.get(cell, ()))
+        indices = self._always + [
+            i for i in found if self._reaches(i, height, box)
+        ]
+        # keep the order of the full scan, it decides between equal events
+        return [self._edges[i] for i in sorted(indices)]
+
+
+class _SourceIndex:
     """
     In highly symmetrical shapes with reflex vertices multiple sources may share
-    the same location. This function merges those sources.
-    """
-    sources = {}
-    to_remove = []
-    for i, p in enumerate(skeleton):
-        source = tuple(i for i in p.source)
-        if source in sources:
-            source_index = sources[source]
-            # source exists, merge sinks
-            for sink in p.sinks:
-                if sink not in skeleton[source_index].sinks:
-                    skeleton[source_index].sinks.append(sink)
-            to_remove.append(i)
+    the same location. The index merges those sources as the subtrees are
+    emitted, using a spatial hash quantized to the merge tolerance.
+    """
+
+    def __init__(self, tolerance: float) -> None:
+        self._tolerance = tolerance
+        self._cells = {}
+        self._subtrees = []
+        self._sinks = []
+
+    def _key(self, x: float, y: float) -> tuple:
+        if self._tolerance <= 0:
+            return (x, y)
+        return (
+            math.floor(x / self._tolerance),
+            math.floor(y / self._tolerance),
+        )
+
+    def find(self, point: Point2) -> int | None:
+        """Returns the index of the subtree whose source is at point."""
+        if self._tolerance <= 0:
+            return next(iter(self._cells.get((point.x, point.y), ())), None)
+        cx, cy = self._key(point.x, point.y)
+        found, closest = None, self._tolerance
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                # a cell may hold several sources further than the tolerance
+                for index in self._cells.get((cx + dx, cy + dy), ()):
+                    distance = abs(self._subtrees[index].source - point)
+                    if distance <= closest:
+                        found, closest = index, distance
+        return found
+
+    def add(self, subtree: Subtree) -> None:
+        index = self.find(subtree.source)
+        if index is None:
+            index = len(self._subtrees)
+            key = self._key(subtree.source.x, subtree.source.y)
+            self._cells.setdefault(key, []).append(index)
+            self._subtrees.append(Subtree(subtree.source, subtree.height, []))
+            self._sinks.append(set())
+        target = self._subtrees[index]
+        seen = self._sinks[index]
+        for sink in subtree.sinks:
+            # sinks pointing at an already merged source follow it
+            sink_index = self.find(sink)
+            if sink_index is not None:
+                sink = self._subtrees[sink_index].source
+            if sink_index == index or (sink.x, sink.y) in seen:
+                continue
+            seen.add((sink.x, sink.y))
+            target.sinks.append(sink)
+
+    def subtrees(self) -> list[Subtree]:
+        return self._subtrees
+
+
+def _normalization(contours: list) -> tuple[float, float, float]:
+    """
+    Returns the centre and the scale mapping the contours to a unit box.
+    """
+    xs = [x for (x, _) in chain.from_iterable(contours)]
+    ys = [y for (_, y) in chain.from_iterable(contours)]
+    if not xs:
+        return (0.0, 0.0, 1.0)
+    scale = max(max(xs) - min(xs), max(ys) - min(ys)) or 1.0
+    return ((max(xs) + min(xs)) / 2, (max(ys) + min(ys)) / 2, scale)
+
+
+def _normalize(contour: list, cx: float, cy: float, scale: float) -> list:
+    return [((x - cx) / scale, (y - cy) / scale) for (x, y) in contour]
+
+
+def _restorer(
+    contours: list, cx: float, cy: float, scale: float
+) -> Callable[[Point2], Point2]:
+    """
+    Returns a function mapping normalized points back to the original
+    coordinates. Polygon vertices and repeated points map to exactly the same
+    points.
+    """
+    points = {}
+    for contour in contours:
+        for x, y in contour:
+            nx, ny = _normalize([(x, y)], cx, cy, scale)[0]
+            points[(nx, ny)] = Point2(x, y)
+
+    def restore(point: Point2) -> Point2:
+        key = (point.x, point.y)
+        if key not in points:
+            points[key] = Point2(point.x * scale + cx, point.y * scale + cy)
+        return points[key]
+
+    return restore
+
+
+def _denormalize(
+    skeleton: list[Subtree], restore: Callable[[Point2], Point2], scale: float
+) -> list:
+    """
+    Maps a skeleton computed on normalized contours back to the original
+    coordinates.
+    """
+    return [
+        Subtree(
+            restore(subtree.source),
+            subtree.height * scale,
+            [restore(sink) for sink in subtree.sinks],
+        )
+        for subtree in skeleton
+    ]
+
+
+def _vertex_events(batch: list, tolerance: float) -> dict:
+    """
+    Pairs the split events of a batch where two reflex vertices hit an edge of
+    each other at the same point, see _SLAV.handle_vertex_event.
+    """
+    splits = [event for event in batch if isinstance(event, _SplitEvent)]
+    pairs = {}
+    for i, a in enumerate(splits):
+        for b in splits[i + 1 :]:
+            if (
+                a.vertex is b.vertex
+                or id(a) in pairs
+                or id(b) in pairs
+                or not _approximately_equals(
+                    a.intersection_point, b.intersection_point, tolerance
+                )
+            ):
+                continue
+            edges_a = (
+                _segment_key(a.vertex.edge_left),
+                _segment_key(a.vertex.edge_right),
+            )
+            edges_b = (
+                _segment_key(b.vertex.edge_left),
+                _segment_key(b.vertex.edge_right),
+            )
+            if (
+                _segment_key(a.opposite_edge) in edges_b
+                and _segment_key(b.opposite_edge) in edges_a
+            ):
+                pairs[id(a)] = b
+                pairs[id(b)] = a
+    return pairs
+
+
+def _slides_along(vertex: _LAVertex, direction: Vector2) -> bool:
+    """Whether the bisector of the vertex runs along the direction."""
+    return abs(_cross(vertex.bisector.v.normalized(), direction)) <= EPSILON
+
+
+def _resolve(vertex: _LAVertex, point: Point2, tolerance: float) -> _LAVertex:
+    """
+    Follows the replacements of an invalidated vertex that were created at the
+    given point, i.e. by concurrent events at the same location.
+    """
+    while (
+        not vertex.is_valid
+        and vertex.replacement is not None
+        and abs(vertex.replacement.point - point) <= tolerance
+    ):
+        vertex = vertex.replacement
+    return vertex
+
+
+class SeedCache:
+    """
+    Cache of the split events found while seeding the event queue.
+
+    Reusing a cache for consecutive skeletons of a slightly modified polygon
+    (e.g. while a vertex is being dragged) limits the split event scan of the
+    unchanged reflex vertices to the edges that changed.
+    """
+
+    def __init__(self) -> None:
+        self._tolerance = None
+        self._edges = set()
+        self._splits = {}
+
+    def __len__(self) -> int:
+        return len(self._splits)
+
+    def clear(self) -> None:
+        self._tolerance = None
+        self._edges = set()
+        self._splits = {}
+
+
+def _point_key(vertex: _LAVertex) -> tuple[float, float]:
+    return (vertex.point.x, vertex.point.y)
+
+
+def _vertex_key(vertex: _LAVertex) -> tuple:
+    # the bisector of a vertex depends on its neighbours
+    return (
+        _point_key(vertex.prev),
+        _point_key(vertex),
+        _point_key(vertex.next),
+    )
+
+
+def _edge_key(vertex: _LAVertex) -> tuple:
+    # the original edge ending at the vertex, with the bisectors of its ends
+    return (_point_key(vertex.prev.prev), *_vertex_key(vertex))
+
+
+# SLAV and time.time() deadline of a seeding worker process, set once by
+# _init_seed_worker
+_seed_slav = None
+_seed_deadline = None
+
+
+def _init_seed_worker(
+    polygon: list, holes: list, deadline: float | None
+) -> None:
+    global _seed_slav, _seed_deadline
+    _seed_deadline = deadline
+    _seed_slav = _SLAV(polygon, holes)
+    _seed_slav._vertices = list(chain.from_iterable(_seed_slav))
+    _seed_slav._edge_indices = {
+        id(edge.edge): i for i, edge in enumerate(_seed_slav._original_edges)
+    }
+
+
+def _seed_chunk(indices: list[int]) -> list | None:
+    """
+    Computes the closest split events of the vertices at the given indices in
+    a worker process. The events are encoded by edge indices, which are the
+    same in every process building the SLAV from the same contours. Returns
+    None once the deadline has passed.
+    """
+    encoded = []
+    for index in indices:
+        if _seed_deadline is not None and time.time() > _seed_deadline:
+            return None
+        vertex = _seed_slav._vertices[index]
+        event = vertex.closest_event(
+            vertex.split_events(_seed_slav.split_candidates(vertex))
+        )
+        if event is None:
+            encoded.append(None)
         else:
-            sources[source] = i
-    for i in reversed(to_remove):
-        skeleton.pop(i)
+            encoded.append(
+                (
+                    event.distance,
+                    (event.intersection_point.x, event.intersection_point.y),
+                    _seed_slav._edge_indices[id(event.opposite_edge)],
+                )
+            )
+    return encoded
+
+
+def _scan_splits(
+    slav: _SLAV,
+    vertices: list[_LAVertex],
+    indices: list[int],
+    polygon: list,
+    holes: list,
+    workers: int,
+    budget: _Budget,
+) -> dict:
+    """
+    Returns the closest split events of the vertices at the given indices.
+
+    The scan is distributed over worker threads on free-threaded builds of
+    Python, and over worker processes otherwise. It only reads the original
+    edges of the SLAV. The timeout of the budget is checked for every vertex.
+    """
+    edges = slav._original_edges
+
+    def scan(i: int) -> _SplitEvent | None:
+        if budget.timed_out():
+            raise SkeletonBudgetExceeded("timeout", [])
+        vertex = vertices[i]
+        return vertex.closest_event(
+            vertex.split_events(slav.split_candidates(vertex))
+        )
+
+    if workers <= 1 or len(indices) < 2 * workers:
+        return {i: scan(i) for i in indices}
 
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def skeletonize(polygon: list, holes: list | None = None) -> list[Subtree]:
+    chunk_size = math.ceil(len(indices) / (workers * 4))
+    chunks = [
+        indices[i : i + chunk_size] for i in range(0, len(indices), chunk_size)
+    ]
+    splits = {}
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if not gil_enabled:
+        with ThreadPoolExecutor(workers) as executor:
+            results = executor.map(
+                lambda chunk: [scan(i) for i in chunk], chunks
+            )
+            for chunk, events in zip(chunks, results, strict=True):
+                splits.update(zip(chunk, events, strict=True))
+        return splits
+
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_init_seed_worker,
+        initargs=(polygon, holes, budget.wall_deadline()),
+    ) as executor:
+        for chunk, encoded in zip(
+            chunks, executor.map(_seed_chunk, chunks), strict=True
+        ):
+            if encoded is None:
+                executor.shutdown(cancel_futures=True)
+                raise SkeletonBudgetExceeded("timeout", [])
+            for i, item in zip(chunk, encoded, strict=True):
+                if item is None:
+                    splits[i] = None
+                    continue
+                distance, (x, y), edge = item
+                splits[i] = _SplitEvent(
+                    distance, Point2(x, y), vertices[i], edges[edge].edge
+                )
+    return splits
+
+
+def _seed_events(
+    slav: _SLAV,
+    polygon: list,
+    holes: list,
+    workers: int,
+    cache: SeedCache | None,
+    budget: _Budget,
+) -> list:
+    """
+    Computes the first event of every vertex, in the order of the vertices,
+    raising SkeletonBudgetExceeded if the timeout of the budget runs out.
+    """
+    vertices = list(chain.from_iterable(slav))
+    edges = slav._original_edges
+    reflex = [i for i, vertex in enumerate(vertices) if vertex.is_reflex]
+    splits = {}
+    scan = reflex
+
+    if cache is not None:
+        if cache._tolerance != slav.tolerance:
+            cache.clear()
+            cache._tolerance = slav.tolerance
+        edge_keys = [_edge_key(vertex) for vertex in vertices]
+        edge_indices = {key: i for i, key in enumerate(edge_keys)}
+        new_edges = {
+            id(edge)
+            for edge, key in zip(edges, edge_keys, strict=True)
+            if key not in cache._edges
+        }
+        scan = []
+        for i in reflex:
+            if budget.timed_out():
+                raise SkeletonBudgetExceeded("timeout", [])
+            key = _vertex_key(vertices[i])
+            if key not in cache._splits:
+                scan.append(i)
+                continue
+            cached = cache._splits[key]
+            if cached is not None and cached[0] not in edge_indices:
+                # the closest edge changed, the vertex is scanned again
+                scan.append(i)
+                continue
+            candidates = vertices[i].split_events(
+                [
+                    edge
+                    for edge in slav.split_candidates(vertices[i])
+                    if id(edge) in new_edges
+                ]
+            )
+            if cached is not None:
+                edge_key, distance, (x, y) = cached
+                candidates.insert(
+                    0,
+                    _SplitEvent(
+                        distance,
+                        Point2(x, y),
+                        vertices[i],
+                        edges[edge_indices[edge_key]].edge,
+                    ),
+                )
+            splits[i] = vertices[i].closest_event(candidates)
+
+    splits.update(
+        _scan_splits(slav, vertices, scan, polygon, holes, workers, budget)
+    )
+
+    if cache is not None:
+        keys_by_edge = {
+            id(edge.edge): key
+            for edge, key in zip(edges, edge_keys, strict=True)
+        }
+        cache._edges = set(edge_keys)
+        cache._splits = {
+            _vertex_key(vertices[i]): None
+            if splits[i] is None
+            else (
+                keys_by_edge[id(splits[i].opposite_edge)],
+                splits[i].distance,
+                (
+                    splits[i].intersection_point.x,
+                    splits[i].intersection_point.y,
+                ),
+            )
+            for i in reflex
+        }
+
+    events = []
+    for i, vertex in enumerate(vertices):
+        candidates = vertex.edge_events()
+        if splits.get(i) is not None:
+            candidates.insert(0, splits[i])
+        events.append(vertex.closest_event(candidates))
+    return events
+
+
+def skeletonize(
+    polygon: list,
+    holes: list | None = None,
+    merge_tolerance: float | None = None,
+    rescale: bool = False,
+    max_events: int | None = None,
+    timeout: float | None = None,
+    max_queue_size: int | None = None,
+    workers: int = 1,
+    cache: SeedCache | None = None,
+    canonical: bool = False,
+) -> list[Subtree]:
     """
     Compute the straight skeleton of a polygon.
 
@@ -573,31 +1422,474 @@ def skeletonize(polygon: list, holes: list | None = None) -> list[Subtree]:
     Returns the straight skeleton as a list of "subtrees", which are in the form
     of (source, height, sinks), where source is the highest points, height is
     its height, and sinks are the point connected to the source.
+
+    Sources closer to each other than merge_tolerance are merged into one
+    subtree. A tolerance of 0 only merges sources at exactly the same location.
+    By default the tolerance is EPSILON relative to the extent of the polygon.
+
+    With rescale the contours are centred and scaled to a unit box before the
+    skeleton is computed, which preserves precision for inputs far from the
+    origin (e.g. projected coordinates). The skeleton is mapped back to the
+    original coordinates.
+
+    The computation can be bounded by the number of processed events
+    (max_events), the wall time in seconds (timeout) and the number of pending
+    events (max_queue_size). When a budget is exceeded SkeletonBudgetExceeded
+    is raised, carrying the partial skeleton. SkeletonCorrupted is raised,
+    regardless of the budgets, when an event leaves a wavefront loop that
+    doesn't close.
+
+    With workers > 1 the first events of the reflex vertices, which scan all
+    the edges of the polygon, are computed in parallel. workers=0 uses one
+    worker per CPU.
+
+    A SeedCache passed as cache is updated with the split events found for the
+    reflex vertices, and reused by the next call with the same cache.
+
+    The order of the subtrees and sinks depends on the order of the events.
+    With canonical they are sorted instead, see canonicalize.
     """
-    slav = _SLAV(polygon, [] if holes is None else holes)
-    output = []
-    prioque = _EventQueue()
+    skeleton = _skeletonize(
+        polygon,
+        holes,
+        merge_tolerance,
+        rescale,
+        max_events,
+        timeout,
+        max_queue_size,
+        workers,
+        cache,
+        False,
+    )[0]
+    return canonicalize(skeleton) if canonical else skeleton
+
+
+def canonicalize(skeleton: list[Subtree]) -> list[Subtree]:
+    """
+    Sorts the subtrees by source and height and the sinks of every subtree by
+    coordinates, so that skeletons computed in different ways compare equal.
+    """
+    return sorted(
+        (
+            Subtree(
+                subtree.source,
+                subtree.height,
+                sorted(subtree.sinks, key=lambda sink: (sink.x, sink.y)),
+            )
+            for subtree in skeleton
+        ),
+        key=lambda st: (st.source.x, st.source.y, st.height),
+    )
 
-    for lav in slav:
-        for vertex in lav:
-            prioque.put(vertex.next_event())
 
-    while not (prioque.empty() or slav.empty()):
-        i = prioque.get()
-        if isinstance(i, _EdgeEvent):
-            if not i.vertex_a.is_valid or not i.vertex_b.is_valid:
-                continue
+def fingerprint(skeleton: list[Subtree], decimals: int = 6) -> str:
+    """
+    Hash of a skeleton, independent of the order of its subtrees and sinks.
+
+    Coordinates and heights are rounded to the given number of decimals
+    before hashing, so that skeletons equal up to rounding noise share their
+    fingerprint (values close to a rounding boundary may still differ).
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest (32 characters).
+    """
+
+    def rounded(value: float) -> float:
+        # adding 0.0 turns -0.0 into 0.0
+        return round(value, decimals) + 0.0
+
+    # sorted after rounding, so that noise doesn't change the order
+    subtrees = sorted(
+        (
+            rounded(subtree.source.x),
+            rounded(subtree.source.y),
+            rounded(subtree.height),
+            sorted(
+                (rounded(sink.x), rounded(sink.y)) for sink in subtree.sinks
+            ),
+        )
+        for subtree in skeleton
+    )
+    digest = hashlib.blake2b(digest_size=16)
+    for x, y, height, sinks in subtrees:
+        digest.update(
+            struct.pack(
+                f"<3dI{2 * len(sinks)}d",
+                x,
+                y,
+                height,
+                len(sinks),
+                *chain.from_iterable(sinks),
+            )
+        )
+    return digest.hexdigest()
+
+
+@dataclass
+class RoofMesh:
+    vertices: list[tuple[float, float, float]]
+    faces: list[list[int]]
+    # edges, as (x, y) end points, whose face didn't close a simple ring and
+    # is missing from faces
+    failed: list[tuple[tuple[float, float], tuple[float, float]]] = field(
+        default_factory=list
+    )
+
+
+def roof_mesh(
+    polygon: list,
+    holes: list | None = None,
+    triangulate: bool = False,
+    merge_tolerance: float | None = None,
+    rescale: bool = False,
+    max_events: int | None = None,
+    timeout: float | None = None,
+    max_queue_size: int | None = None,
+    workers: int = 1,
+    cache: SeedCache | None = None,
+) -> RoofMesh:
+    """
+    Compute the roof mesh of a polygon from its straight skeleton.
+
+    Every edge of the polygon gets one face: the area swept by its wavefront,
+    with the height of the skeleton as z. The event loop records the nodes of
+    every face, which are then ordered by walking the skeleton arcs around the
+    face.
+
+    Returns a RoofMesh of vertices (x, y, z) and faces, which are lists of
+    vertex indices with the orientation of the polygon. With triangulate the
+    faces are split into triangles. The edges whose recorded nodes don't close
+    a simple face are listed in failed instead, the other faces are kept.
+
+    The other arguments are the same as for skeletonize.
+    """
+    _, rings = _skeletonize(
+        polygon,
+        holes,
+        merge_tolerance,
+        rescale,
+        max_events,
+        timeout,
+        max_queue_size,
+        workers,
+        cache,
+        True,
+    )
+    return _mesh(rings, triangulate)
+
+
+def _mesh(rings: list, triangulate: bool) -> RoofMesh:
+    """
+    Builds the RoofMesh of the face rings returned by _face_rings.
+    """
+    vertices = []
+    indices = {}
+    faces = []
+    failed = []
+    for ring, closed in rings:
+        if not closed:
+            failed.append((ring[0][:2], ring[1][:2]))
+            continue
+        face = []
+        for point in ring:
+            if point not in indices:
+                indices[point] = len(vertices)
+                vertices.append(point)
+            face.append(indices[point])
+        if triangulate:
+            faces.extend(
+                [face[a], face[b], face[c]] for a, b, c in _triangulate(ring)
+            )
+        else:
+            faces.append(face)
+    return RoofMesh(vertices, faces, failed)
+
+
+def _face_chain(start: tuple, end: tuple, nodes: set, neighbours: dict) -> list:
+    """
+    Walks the skeleton arcs through the given nodes from the end of an edge
+    back to its start, keeping the face of the edge on the right: every step
+    takes the arc that follows the way back counterclockwise. Returns the
+    nodes between end and start, or None if the arcs don't lead back.
+    """
+    path = []
+    previous, node = start, end
+    for _ in range(len(nodes) + 1):
+        candidates = [
+            (_turn(previous, node, neighbour), neighbour)
+            for neighbour in neighbours.get(node, ())
+            if (neighbour in nodes and neighbour not in path)
+            or (neighbour == start and path)
+        ]
+        if not candidates:
+            return None
+        previous, node = node, min(candidates)[1]
+        if node == start:
+            return path
+        path.append(node)
+    return None
+
+
+def _turn(previous: tuple, node: tuple, neighbour: tuple) -> tuple:
+    """
+    Sort key of the arcs leaving node: the counterclockwise angle from the
+    way back to previous, then the length.
+    """
+    back = math.atan2(previous[1] - node[1], previous[0] - node[0])
+    dx, dy = neighbour[0] - node[0], neighbour[1] - node[1]
+    angle = (math.atan2(dy, dx) - back) % (2 * math.pi)
+    return (angle or 2 * math.pi, math.hypot(dx, dy))
+
+
+def _face_rings(slav: _SLAV, sources: _SourceIndex) -> list:
+    """
+    Returns the face of every original edge as a ring of (x, y, height)
+    points: the edge followed by the nodes recorded for the face, back to the
+    start of the edge. Every ring comes with whether it closed a simple face,
+    the ring of a face that didn't only holds its edge.
+    """
+    subtrees = sources.subtrees()
+    heights = {}
+    neighbours = {}
+    for subtree in subtrees:
+        source = (subtree.source.x, subtree.source.y)
+        heights[source] = subtree.height
+        for sink in subtree.sinks:
+            neighbours.setdefault(source, set()).add((sink.x, sink.y))
+            neighbours.setdefault((sink.x, sink.y), set()).add(source)
+
+    rings = []
+    for (start, end), points in zip(slav._face_ends, slav._faces, strict=True):
+        nodes = set()
+        for point in points:
+            index = sources.find(point)
+            if index is not None:
+                nodes.add((subtrees[index].source.x, subtrees[index].source.y))
+        start = (start.x, start.y)
+        end = (end.x, end.y)
+        nodes -= {start, end}
+        path = _face_chain(start, end, nodes, neighbours)
+        ring = [(*start, 0.0), (*end, 0.0)] + [
+            (*node, heights[node]) for node in path or ()
+        ]
+        if path is not None and _is_simple(ring):
+            rings.append((ring, True))
+        else:
+            rings.append((ring[:2], False))
+    return rings
+
+
+def _is_simple(ring: list) -> bool:
+    """
+    Whether no two edges of the ring, given by its (x, y, ...) points, cross
+    each other. Touching edges are allowed.
+    """
+
+    def orientation(a: tuple, b: tuple, c: tuple) -> int:
+        det = orient2d(a, b, c)
+        return (det > 0) - (det < 0)
+
+    edges = list(zip(ring, ring[1:] + ring[:1], strict=True))
+    for i, (a, b) in enumerate(edges):
+        for c, d in edges[i + 2 : len(edges) - (i == 0)]:
+            if (
+                orientation(a, b, c) * orientation(a, b, d) < 0
+                and orientation(c, d, a) * orientation(c, d, b) < 0
+            ):
+                return False
+    return True
+
+
+def _triangulate(ring: list) -> list[tuple[int, int, int]]:
+    """
+    Ear clipping triangulation of a simple polygon, given by the (x, y, ...)
+    points of its ring. Returns triangles as index triples.
+    """
 
-            (arc, events) = slav.handle_edge_event(i)
-        elif isinstance(i, _SplitEvent):
-            if not i.vertex.is_valid:
+    def orientation(a: int, b: int, c: int) -> float:
+        return orient2d(ring[a], ring[b], ring[c])
+
+    indices = list(range(len(ring)))
+    area = sum(
+        cross(*ring[i][:2], *ring[(i + 1) % len(ring)][:2]) for i in indices
+    )
+    sign = 1 if area > 0 else -1
+    triangles = []
+    while len(indices) > 3:
+        for k in range(len(indices)):
+            a, b, c = (
+                indices[k - 1],
+                indices[k],
+                indices[(k + 1) % len(indices)],
+            )
+            if orientation(a, b, c) * sign <= 0:
+                continue
+            if any(
+                orientation(a, b, i) * sign >= 0
+                and orientation(b, c, i) * sign >= 0
+                and orientation(c, a, i) * sign >= 0
+                for i in indices
+                if i not in (a, b, c)
+            ):
                 continue
-            (arc, events) = slav.handle_split_event(i)
+            triangles.append((a, b, c))
+            del indices[k]
+            break
+        else:
+            # degenerate ring without a proper ear
+            triangles.extend(
+                (indices[0], indices[k], indices[k + 1])
+                for k in range(1, len(indices) - 1)
+            )
+            return triangles
+    triangles.append(tuple(indices))
+    return triangles
+
+
+def _skeletonize(
+    polygon: list,
+    holes: list | None,
+    merge_tolerance: float | None,
+    rescale: bool,
+    max_events: int | None,
+    timeout: float | None,
+    max_queue_size: int | None,
+    workers: int,
+    cache: SeedCache | None,
+    faces: bool,
+) -> tuple[list[Subtree], list | None]:
+    """
+    Runs the event loop, see skeletonize. With faces, also returns the face of
+    every original edge as a ring of (x, y, height) points, see _face_rings.
+    """
+    holes = [] if holes is None else holes
+    if rescale:
+        contours = [polygon, *holes]
+        cx, cy, scale = _normalization(contours)
+        restore = _restorer(contours, cx, cy, scale)
+        try:
+            skeleton, rings = _skeletonize(
+                _normalize(polygon, cx, cy, scale),
+                [_normalize(hole, cx, cy, scale) for hole in holes],
+                None if merge_tolerance is None else merge_tolerance / scale,
+                False,
+                max_events,
+                timeout,
+                max_queue_size,
+                workers,
+                cache,
+                faces,
+            )
+        except (SkeletonBudgetExceeded, SkeletonCorrupted) as e:
+            e.skeleton = _denormalize(e.skeleton, restore, scale)
+            raise
+        if rings is not None:
+            rings = [
+                (
+                    [(*restore(Point2(x, y)), z * scale) for (x, y, z) in ring],
+                    closed,
+                )
+                for ring, closed in rings
+            ]
+        return _denormalize(skeleton, restore, scale), rings
+
+    slav = _SLAV(polygon, holes)
+    if faces:
+        slav.track_faces()
+    if merge_tolerance is None:
+        merge_tolerance = slav.extent * EPSILON
+    sources = _SourceIndex(merge_tolerance)
+    prioque = _EventQueue()
+    budget = _Budget(max_events, timeout, max_queue_size)
 
-        prioque.put_all(events)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    for event in _seed_events(slav, polygon, holes, workers, cache, budget):
+        prioque.put(event)
 
-        if arc is not None:
-            output.append(arc)
+    while not (prioque.empty() or slav.empty()):
+        # events at the same height are resolved together, the next events of
+        # the new vertices are computed once the whole batch is processed
+        batch = [prioque.get()]
+        while (
+            not prioque.empty()
+            and prioque.peek().distance - batch[0].distance <= merge_tolerance
+        ):
+            batch.append(prioque.get())
+
+        new_vertices = []
+        pairs = _vertex_events(batch, merge_tolerance)
+        for i in batch:
+            exceeded = budget.exceeded(len(prioque))
+            if exceeded is not None:
+                raise SkeletonBudgetExceeded(exceeded, sources.subtrees())
+            if isinstance(i, _EdgeEvent):
+                # vertices replaced by a concurrent event at the same point are
+                # unified with their replacement instead of being dropped
+                vertex_a = _resolve(
+                    i.vertex_a, i.intersection_point, merge_tolerance
+                )
+                vertex_b = _resolve(
+                    i.vertex_b, i.intersection_point, merge_tolerance
+                )
+                if not vertex_a.is_valid or not vertex_b.is_valid:
+                    continue
+                # a split event may have moved the vertices apart
+                if vertex_a.next is not vertex_b:
+                    continue
+                if vertex_a is not i.vertex_a or vertex_b is not i.vertex_b:
+                    i = _EdgeEvent(
+                        i.distance, i.intersection_point, vertex_a, vertex_b
+                    )
 
-    _merge_sources(output)
-    return output
+                (arc, vertices) = slav.handle_edge_event(i)
+            elif isinstance(i, _SplitEvent):
+                if not i.vertex.is_valid:
+                    continue
+                other = pairs.get(id(i))
+                try:
+                    if other is not None and other.vertex.is_valid:
+                        (arc, vertices) = slav.handle_vertex_event(i, other)
+                    else:
+                        (arc, vertices) = slav.handle_split_event(i)
+                except SkeletonCorrupted as e:
+                    e.skeleton = sources.subtrees()
+                    raise
+
+            new_vertices.extend((vertex, i.distance) for vertex in vertices)
+
+            if arc is not None:
+                sources.add(arc)
+
+        # new vertices that coincide with a neighbour, or whose edges collapsed
+        # onto each other, are unified right away. The others get their next
+        # event once all of them are resolved, so that it isn't computed
+        # against a neighbour that is about to be replaced.
+        pending = []
+        while new_vertices:
+            vertex, distance = new_vertices.pop()
+            if not vertex.is_valid:
+                continue
+            if abs(vertex.next.point - vertex.point) <= merge_tolerance:
+                event = _EdgeEvent(distance, vertex.point, vertex, vertex.next)
+            elif abs(vertex.prev.point - vertex.point) <= merge_tolerance:
+                event = _EdgeEvent(distance, vertex.point, vertex.prev, vertex)
+            elif vertex.is_collapsed(merge_tolerance):
+                event = vertex.closest_event(vertex.edge_events())
+                if event is None:
+                    pending.append(vertex)
+                    continue
+            else:
+                pending.append(vertex)
+                continue
+            (arc, vertices) = slav.handle_edge_event(event)
+            new_vertices.extend((vertex, distance) for vertex in vertices)
+            sources.add(arc)
+        for vertex in pending:
+            if vertex.is_valid:
+                prioque.put(vertex.next_event())
+
+    skeleton = sources.subtrees()
+    if not faces:
+        return skeleton, None
+    return skeleton, _face_rings(slav, sources)
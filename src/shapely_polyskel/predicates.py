@@ -0,0 +1,127 @@
+"""
+Geometric predicates used by the straight skeleton algorithm.
+
+Orientation tests are evaluated in floating point first. Only when the result
+lies within the rounding error bound of the computation they are re-evaluated
+exactly with rational arithmetic on the input coordinates, so the common case
+stays fast and the sign is always exact.
+
+The side test of the skeleton is not exact on purpose: points within an
+angular tolerance of the line are considered on it. That tolerance step comes
+first, the exact orientation only decides the points outside of it.
+"""
+
+from collections.abc import Sequence
+from fractions import Fraction
+
+from euclid3 import Point2, Vector2
+
+# Error bound of a 2x2 determinant of coordinate differences evaluated in
+# double precision, see Shewchuk, Adaptive Precision Floating-Point Arithmetic
+# and Fast Robust Geometric Predicates (1997).
+_MACHINE_EPSILON = 2.0**-53
+_CROSS_ERROR_BOUND = (3.0 + 16.0 * _MACHINE_EPSILON) * _MACHINE_EPSILON
+
+
+def _signed(exact: Fraction) -> float:
+    # keep the sign even if the magnitude underflows
+    if exact == 0:
+        return 0.0
+    return float(exact) or (5e-324 if exact > 0 else -5e-324)
+
+
+def cross(ux: float, uy: float, vx: float, vy: float) -> float:
+    """Cross product of two vectors with an exact sign.
+
+    Args:
+        ux (float): x of the first vector.
+        uy (float): y of the first vector.
+        vx (float): x of the second vector.
+        vy (float): y of the second vector.
+
+    Returns:
+        float: The cross product. Its sign is exact even when the floating
+            point evaluation cancels out.
+    """
+    left = ux * vy
+    right = vx * uy
+    det = left - right
+    if abs(det) > _CROSS_ERROR_BOUND * (abs(left) + abs(right)):
+        return det
+    return _signed(Fraction(ux) * Fraction(vy) - Fraction(vx) * Fraction(uy))
+
+
+def orient2d(
+    a: Sequence[float], b: Sequence[float], c: Sequence[float]
+) -> float:
+    """Orientation of three points with an exact sign.
+
+    The coordinate differences are part of the exact re-evaluation, so unlike
+    cross of precomputed differences the sign doesn't suffer from their
+    rounding.
+
+    Args:
+        a (Sequence[float]): First point, only its x and y are used.
+        b (Sequence[float]): Second point.
+        c (Sequence[float]): Third point.
+
+    Returns:
+        float: Twice the signed area of the triangle abc, positive if c lies
+            to the left of the line from a to b and 0 only if the points are
+            exactly collinear.
+    """
+    left = (a[0] - c[0]) * (b[1] - c[1])
+    right = (a[1] - c[1]) * (b[0] - c[0])
+    det = left - right
+    if abs(det) > _CROSS_ERROR_BOUND * (abs(left) + abs(right)):
+        return det
+    ax, ay, bx, by, cx, cy = map(Fraction, (a[0], a[1], b[0], b[1], c[0], c[1]))
+    return _signed((ax - cx) * (by - cy) - (ay - cy) * (bx - cx))
+
+
+def _orient_direction(
+    origin: Point2, direction: Vector2, point: Point2
+) -> float:
+    # orientation of point against the line through origin along direction,
+    # with an exact sign
+    left = direction.x * (point.y - origin.y)
+    right = direction.y * (point.x - origin.x)
+    det = left - right
+    if abs(det) > _CROSS_ERROR_BOUND * (abs(left) + abs(right)):
+        return det
+    return _signed(
+        Fraction(direction.x) * (Fraction(point.y) - Fraction(origin.y))
+        - Fraction(direction.y) * (Fraction(point.x) - Fraction(origin.x))
+    )
+
+
+def side(
+    origin: Point2, direction: Vector2, point: Point2, tolerance: float
+) -> int:
+    """Angular side test of a point against a directed line.
+
+    The test has two steps. A point whose angle to the line, seen from
+    origin, has a sine under the tolerance is on the line, which absorbs the
+    rounding of the skeleton nodes. The side of any other point is the exact
+    sign of its orientation, see orient2d. With a tolerance of 0 the test is
+    exact.
+
+    Args:
+        origin (Point2): A point on the line.
+        direction (Vector2): Direction of the line.
+        point (Point2): Tested point.
+        tolerance (float): Sine of the angle under which the point is still
+            considered to be on the line.
+
+    Returns:
+        int: 1 if the point is to the left of the line, -1 if it is to the
+            right and 0 if it lies on the line within the tolerance.
+    """
+    if tolerance > 0:
+        wx = point.x - origin.x
+        wy = point.y - origin.y
+        bound = tolerance * abs(direction) * (wx * wx + wy * wy) ** 0.5
+        if abs(direction.x * wy - direction.y * wx) <= bound:
+            return 0
+    det = _orient_direction(origin, direction, point)
+    return (det > 0) - (det < 0)
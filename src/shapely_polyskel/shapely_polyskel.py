@@ -1,29 +1,101 @@
+from euclid3 import Point2
 from shapely import (
-    GeometryCollection,
     LineString,
     MultiLineString,
     MultiPoint,
     Point,
     Polygon,
+    hausdorff_distance,
     normalize,
     simplify,
 )
 
-from .polyskel import skeletonize
+from .graph import SkeletonGraph
+from .polyskel import (
+    RoofMesh,
+    SeedCache,
+    SkeletonBudgetExceeded,
+    _mesh,
+    _skeletonize,
+    canonicalize,
+    fingerprint,
+)
+from .svg import SkeletonRenderer
 
 
 class StraightSkeleton:
     """StraightSkeleton"""
 
-    def __init__(self, polygon: Polygon) -> None:
+    svg_max_elements = 5000
+
+    def __init__(
+        self,
+        polygon: Polygon,
+        rescale: bool = False,
+        max_events: int | None = None,
+        timeout: float | None = None,
+        max_queue_size: int | None = None,
+        fallback_tolerance: float | None = None,
+        lod_tolerance: float | None = None,
+        refine: bool = False,
+        workers: int = 1,
+        canonical: bool = False,
+    ) -> None:
         """Straight skeleton
 
         Args:
             polygon (Polygon): Input polygon.
+            rescale (bool, optional): If True the polygon is centred and
+                scaled to a unit box before the skeleton is computed. Improves
+                precision for projected coordinates. Defaults to False.
+            max_events (int | None, optional): Maximum number of processed
+                events. Defaults to None.
+            timeout (float | None, optional): Maximum computation time in
+                seconds. Defaults to None.
+            max_queue_size (int | None, optional): Maximum number of pending
+                events. Defaults to None.
+            fallback_tolerance (float | None, optional): If a budget is
+                exceeded, the skeleton of the polygon simplified with this
+                tolerance is computed instead. Defaults to None.
+            lod_tolerance (float | None, optional): If given, the skeleton is
+                computed for the polygon simplified (Douglas-Peucker) with this
+                tolerance. Defaults to None.
+            refine (bool, optional): If True, the vertices dropped by the
+                simplification are connected by sinks to the nearest source of
+                their simplified edge whose sink stays inside the polygon.
+                Vertices without such a source aren't connected. Defaults to
+                False.
+            workers (int, optional): Number of workers computing the first
+                events of the reflex vertices. 0 uses one worker per CPU.
+                Defaults to 1.
+            canonical (bool, optional): If True the subtrees and their sinks
+                are sorted, see canonicalize. Defaults to False.
 
         Raises:
             ValueError: Empty polygon.
+            SkeletonBudgetExceeded: A budget was exceeded (also by the
+                fallback, if any).
+            SkeletonCorrupted: A wavefront loop didn't close. The fallback
+                isn't tried.
         """
+        self._validate(polygon)
+        self._polygon = normalize(simplify(polygon, 0))
+        self._rescale = rescale
+        self._workers = workers
+        self._canonical = canonical
+        self._budgets = {
+            "max_events": max_events,
+            "timeout": timeout,
+            "max_queue_size": max_queue_size,
+        }
+        self._fallback_tolerance = fallback_tolerance
+        self._lod_tolerance = lod_tolerance
+        self._refine_sinks = refine
+        self._cache = SeedCache()
+        self._compute()
+
+    @staticmethod
+    def _validate(polygon: Polygon) -> None:
         if polygon.is_empty:
             raise ValueError(
                 "The polygon is empty. The skeleton can't be compute."
@@ -32,24 +104,184 @@ class StraightSkeleton:
             raise ValueError(
                 "The polygon is invalid. The skeleton can't be compute."
             )
+
+    def _compute(self) -> None:
+        self._renderer = None
+        self._is_fallback = False
+        self._skeleton_polygon = self._polygon
+        if self._lod_tolerance is not None:
+            self._skeleton_polygon = normalize(
+                simplify(self._polygon, self._lod_tolerance)
+            )
+            if (
+                self._skeleton_polygon.is_empty
+                or not self._skeleton_polygon.is_valid
+            ):
+                raise ValueError(
+                    "The simplified polygon is empty or invalid. The skeleton "
+                    "can't be compute."
+                )
+        try:
+            self._straight_skeleton = self._skeletonize(self._skeleton_polygon)
+        except SkeletonBudgetExceeded:
+            if self._fallback_tolerance is None:
+                raise
+            fallback = normalize(
+                simplify(self._polygon, self._fallback_tolerance)
+            )
+            if fallback.is_empty or not fallback.is_valid:
+                raise
+            self._straight_skeleton = self._skeletonize(fallback)
+            self._skeleton_polygon = fallback
+            self._is_fallback = True
+
+        self._lod_error = 0.0
+        if self._skeleton_polygon is not self._polygon:
+            self._lod_error = hausdorff_distance(
+                self._polygon, self._skeleton_polygon
+            )
+            if self._refine_sinks:
+                self._refine()
+        if self._canonical:
+            self._straight_skeleton = canonicalize(self._straight_skeleton)
+
+    def update(self, moved_vertices: dict, max_fraction: float = 0.25) -> None:
+        """Moves vertices of the polygon and updates the skeleton.
+
+        The split events of the reflex vertices unaffected by the change are
+        reused from the previous computation, only their scan against the
+        changed edges is repeated.
+
+        Args:
+            moved_vertices (dict): New coordinates by vertex index. Indices
+                refer to the coordinates of the polygon property: an int for
+                the exterior or a (ring, index) tuple, where ring 0 is the
+                exterior and 1.. are the interiors.
+            max_fraction (float, optional): If more than this fraction of the
+                vertices is moved, the skeleton is computed from scratch.
+                Defaults to 0.25.
+
+        Raises:
+            ValueError: Empty or invalid polygon after the change.
+        """
+        rings = [
+            list(ring.coords[:-1])
+            for ring in (self._polygon.exterior, *self._polygon.interiors)
+        ]
+        for key, coords in moved_vertices.items():
+            ring, index = (0, key) if isinstance(key, int) else key
+            rings[ring][index] = tuple(coords)
+        polygon = Polygon(rings[0], rings[1:])
+        self._validate(polygon)
+
+        if len(moved_vertices) > max_fraction * sum(map(len, rings)):
+            self._cache.clear()
         self._polygon = normalize(simplify(polygon, 0))
-        self._straight_skeleton = self._skeletonize()
+        self._compute()
+
+    def _skeletonize(self, polygon: Polygon) -> list:
+        # the faces are recorded along, for roof_mesh
+        polygon_pts = polygon.exterior.coords[:-1]
+        holes_pts = [i.coords[:-1] for i in polygon.interiors]
+        skeleton, self._face_rings = _skeletonize(
+            polygon_pts,
+            holes_pts,
+            merge_tolerance=None,
+            rescale=self._rescale,
+            workers=self._workers,
+            cache=self._cache,
+            faces=True,
+            **self._budgets,
+        )
+        return skeleton
 
-    def _skeletonize(self) -> list:
-        polygon_pts = self._polygon.exterior.coords[:-1]
-        holes_pts = [i.coords[:-1] for i in self._polygon.interiors]
-        return skeletonize(polygon_pts, holes_pts)
+    def _refine(self) -> None:
+        parents = {}
+        for subtree in self._straight_skeleton:
+            for sink in subtree.sinks:
+                parents.setdefault((sink.x, sink.y), []).append(subtree)
+
+        kept = {
+            coords
+            for ring in (
+                self._skeleton_polygon.exterior,
+                *self._skeleton_polygon.interiors,
+            )
+            for coords in ring.coords
+        }
+        # a sink must not leave the input polygon, up to rounding
+        covers = self._polygon.buffer(self._lod_error * 1e-6).covers
+        for ring in (self._polygon.exterior, *self._polygon.interiors):
+            coords = ring.coords[:-1]
+            kept_indices = [i for i, c in enumerate(coords) if c in kept]
+            if not kept_indices:
+                continue
+            # walk the dropped vertices between consecutive kept vertices
+            rotated = kept_indices[1:] + kept_indices[:1]
+            for a, b in zip(kept_indices, rotated, strict=True):
+                dropped = (b - a - 1) % len(coords)
+                candidates = [
+                    parents[coords[i]][0]
+                    for i in (a, b)
+                    if coords[i] in parents
+                ]
+                if not dropped or not candidates:
+                    continue
+                # and the next nodes up their branches
+                for subtree in list(candidates):
+                    source = (subtree.source.x, subtree.source.y)
+                    candidates.extend(parents.get(source, ()))
+                for i in range(a + 1, a + 1 + dropped):
+                    point = Point2(*coords[i % len(coords)])
+                    for subtree in sorted(
+                        candidates,
+                        key=lambda subtree: subtree.source.distance(point),
+                    ):
+                        sink = LineString([tuple(subtree.source), tuple(point)])
+                        if covers(sink):
+                            subtree.sinks.append(point)
+                            break
 
     @property
     def polygon(self) -> Polygon:
         """Returns input polygon."""
         return self._polygon
 
+    @property
+    def skeleton_polygon(self) -> Polygon:
+        """Returns the polygon the skeleton was computed for. Differs from the
+        input polygon in the level of detail and fallback modes."""
+        return self._skeleton_polygon
+
+    @property
+    def lod_error(self) -> float:
+        """Returns the Hausdorff distance between the input polygon and the
+        polygon the skeleton was computed for."""
+        return self._lod_error
+
+    @property
+    def is_fallback(self) -> bool:
+        """Returns True if the skeleton was computed for the simplified
+        fallback polygon."""
+        return self._is_fallback
+
     @property
     def straight_skeleton(self) -> list:
         """Returns straight skeleton (polyskel)."""
         return self._straight_skeleton
 
+    def fingerprint(self, decimals: int = 6) -> str:
+        """Hash of the straight skeleton, independent of its order.
+
+        Args:
+            decimals (int, optional): Number of decimals the coordinates and
+                heights are rounded to. Defaults to 6.
+
+        Returns:
+            str: Hexadecimal digest.
+        """
+        return fingerprint(self._straight_skeleton, decimals)
+
     def _source_points_coords(self, points3d: bool = False) -> list:
         coords = [
             (st.source.x, st.source.y, st.height)
@@ -114,34 +346,74 @@ class StraightSkeleton:
         ]
         return MultiLineString(sinks_lines)
 
+    def roof_mesh(self, triangulate: bool = False) -> RoofMesh:
+        """Roof mesh
+
+        Args:
+            triangulate (bool, optional): If True the faces are split into
+                triangles. Defaults to False.
+
+        Returns:
+            RoofMesh: Vertices (x, y, height) and faces (vertex indices), one
+                face per edge of the skeleton polygon. The faces are recorded
+                when the skeleton is computed. The edges whose face didn't
+                close a simple ring are listed in failed.
+        """
+        return _mesh(self._face_rings, triangulate)
+
+    def graph(self, sinks: bool = False) -> SkeletonGraph:
+        """Straight skeleton graph
+
+        Args:
+            sinks (bool, optional): If True the sinks to the polygon vertices
+                are included, otherwise only the ridges. Defaults to False.
+
+        Returns:
+            SkeletonGraph: Nodes (with heights), edges (with lengths) and CSR
+                adjacency, see SkeletonGraph.prune for spur removal.
+        """
+        return SkeletonGraph.from_skeleton(self._straight_skeleton, sinks)
+
     def __str__(self) -> str:
         return f"StraightSkeleton ({self._polygon})"
 
     def __repr__(self) -> str:
         return f"StraightSkeleton ({self._polygon})"
 
+    def _get_renderer(self) -> SkeletonRenderer:
+        if (
+            self._renderer is None
+            or self._renderer._max_elements != self.svg_max_elements
+        ):
+            rings = [
+                ring.coords[:-1]
+                for ring in (self._polygon.exterior, *self._polygon.interiors)
+            ]
+            self._renderer = SkeletonRenderer(
+                rings,
+                self._straight_skeleton,
+                max_elements=self.svg_max_elements,
+            )
+        return self._renderer
+
     def svg(self, scale_factor: float = 1.0, color: str | None = None) -> str:
         """Returns a group of SVG elements for the straight skeleton.
 
+        The path data is cached until the skeleton changes. Above
+        svg_max_elements segments only the longest ones are drawn.
+
         Args:
             scale_factor (float, optional): Multiplication factor for the SVG
                 stroke-width. Defaults to 1.0.
-            color (str | None, optional): Hex string for stroke or fill color.
-                Default is to use "#66cc99" if geometry is valid, and "#ff3333"
-                if invalid. Defaults to None.
+            color (str | None, optional): Hex string for stroke or fill color
+                of all elements. Default is to use separate colors for the
+                polygon, ridges and sinks. Defaults to None.
 
         Returns:
             str: SVG string.
         """
-        geometry = GeometryCollection(
-            [self._polygon, self.ridges(), self.sinks()]
-        )
-        return geometry.svg(scale_factor, color)
+        return self._get_renderer().svg(scale_factor, color)
 
     def _repr_svg_(self) -> str:
         """SVG representation for iPython notebook"""
-        # TODO Add different colors
-        geometry = GeometryCollection(
-            [self._polygon, self.ridges(), self.sinks()]
-        )
-        return geometry._repr_svg_()
+        return self._get_renderer()._repr_svg_()
@@ -0,0 +1,187 @@
+"""
+SVG rendering of straight skeletons.
+
+The path data is computed once per renderer: coordinates are quantized to a
+grid matching the viewport resolution, segments collapsing to a single grid
+cell are dropped and, above max_elements, only the longest segments are kept.
+"""
+
+import io
+import math
+from typing import TextIO
+
+from .polyskel import Subtree
+
+POLYGON_COLOR = "#66cc99"
+RIDGES_COLOR = "#336699"
+SINKS_COLOR = "#999999"
+
+_SVG_TOP = (
+    '<svg xmlns="http://www.w3.org/2000/svg" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink" '
+)
+
+
+class SkeletonRenderer:
+    """SkeletonRenderer"""
+
+    def __init__(
+        self,
+        rings: list[list[tuple[float, float]]],
+        skeleton: list[Subtree],
+        resolution: int = 2000,
+        max_elements: int = 5000,
+    ) -> None:
+        """SVG renderer
+
+        Args:
+            rings (list[list[tuple[float, float]]]): Exterior and interiors of
+                the polygon.
+            skeleton (list[Subtree]): Straight skeleton (polyskel).
+            resolution (int, optional): Number of grid cells along the widest
+                side of the bounds. Defaults to 2000.
+            max_elements (int, optional): Maximum number of rendered skeleton
+                segments and ring vertices. Defaults to 5000.
+        """
+        self._rings = rings
+        sources = {(st.source.x, st.source.y) for st in skeleton}
+        self._ridges = []
+        self._sinks = []
+        for subtree in skeleton:
+            source = (subtree.source.x, subtree.source.y)
+            for sink in subtree.sinks:
+                sink = (sink.x, sink.y)
+                if sink == source:
+                    continue
+                if sink in sources:
+                    self._ridges.append((source, sink))
+                else:
+                    self._sinks.append((source, sink))
+        self._resolution = resolution
+        self._max_elements = max_elements
+        self._paths = None
+
+        xs = [x for ring in rings for x, _ in ring]
+        ys = [y for ring in rings for _, y in ring]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def _path_data(self) -> tuple[str, str, str]:
+        if self._paths is not None:
+            return self._paths
+        xmin, ymin, xmax, ymax = self.bounds
+        step = max(xmax - xmin, ymax - ymin) / self._resolution or 1.0
+        digits = max(0, 1 - math.floor(math.log10(step)))
+
+        def quantize(point: tuple[float, float]) -> tuple[int, int]:
+            return (
+                round((point[0] - xmin) / step),
+                round((point[1] - ymin) / step),
+            )
+
+        def fmt(cell: tuple[int, int]) -> str:
+            return (
+                f"{xmin + cell[0] * step:.{digits}f},"
+                f"{ymin + cell[1] * step:.{digits}f}"
+            )
+
+        # rings: drop vertices falling into the cell of their predecessor and
+        # keep every n-th vertex above max_elements
+        n_points = sum(map(len, self._rings))
+        stride = math.ceil(n_points / self._max_elements)
+        polygon = io.StringIO()
+        for ring in self._rings:
+            cells = []
+            for point in ring[::stride]:
+                cell = quantize(point)
+                if not cells or cells[-1] != cell:
+                    cells.append(cell)
+            if len(cells) < 3:
+                continue
+            polygon.write("M" + fmt(cells[0]))
+            for cell in cells[1:]:
+                polygon.write(" L" + fmt(cell))
+            polygon.write(" Z ")
+
+        # skeleton: drop duplicate and zero-length segments, keep the longest
+        segments = {}
+        for kind, lines in enumerate((self._ridges, self._sinks)):
+            for a, b in lines:
+                a, b = sorted((quantize(a), quantize(b)))
+                if a != b:
+                    segments[(a, b)] = kind
+        selected = sorted(
+            segments,
+            key=lambda s: (s[1][0] - s[0][0]) ** 2 + (s[1][1] - s[0][1]) ** 2,
+            reverse=True,
+        )[: self._max_elements]
+        lines = (io.StringIO(), io.StringIO())
+        for a, b in selected:
+            lines[segments[(a, b)]].write(f"M{fmt(a)} L{fmt(b)} ")
+
+        self._paths = (
+            polygon.getvalue().strip(),
+            lines[0].getvalue().strip(),
+            lines[1].getvalue().strip(),
+        )
+        return self._paths
+
+    def write(
+        self,
+        stream: TextIO,
+        scale_factor: float = 1.0,
+        color: str | None = None,
+    ) -> None:
+        """Writes a group of SVG elements to a text stream.
+
+        Args:
+            stream (TextIO): Output stream.
+            scale_factor (float, optional): Multiplication factor for the SVG
+                stroke-width. Defaults to 1.0.
+            color (str | None, optional): Hex string used for the polygon,
+                ridges and sinks. Defaults to None (separate colors).
+        """
+        polygon, ridges, sinks = self._path_data()
+        stream.write("<g>")
+        if polygon:
+            stream.write(
+                '<path fill-rule="evenodd" '
+                f'fill="{color or POLYGON_COLOR}" stroke="#555555" '
+                f'stroke-width="{2.0 * scale_factor}" opacity="0.6" '
+                f'd="{polygon}" />'
+            )
+        for data, default in ((sinks, SINKS_COLOR), (ridges, RIDGES_COLOR)):
+            if data:
+                stream.write(
+                    f'<path fill="none" stroke="{color or default}" '
+                    f'stroke-width="{2.0 * scale_factor}" opacity="0.8" '
+                    f'd="{data}" />'
+                )
+        stream.write("</g>")
+
+    def svg(self, scale_factor: float = 1.0, color: str | None = None) -> str:
+        """Returns a group of SVG elements, see write."""
+        stream = io.StringIO()
+        self.write(stream, scale_factor, color)
+        return stream.getvalue()
+
+    def _repr_svg_(self) -> str:
+        """SVG representation for iPython notebook"""
+        xmin, ymin, xmax, ymax = self.bounds
+        # expand the bounds by 4%, like shapely
+        expand = max(xmax - xmin, ymax - ymin) * 0.04 or 1.0
+        xmin -= expand
+        ymin -= expand
+        xmax += expand
+        ymax += expand
+        dx = xmax - xmin
+        dy = ymax - ymin
+        width = min(max(100.0, dx), 300)
+        height = min(max(100.0, dy), 300)
+        scale_factor = max(dx, dy) / max(width, height)
+        return (
+            f'{_SVG_TOP}width="{width}" height="{height}" '
+            f'viewBox="{xmin} {ymin} {dx} {dy}" '
+            'preserveAspectRatio="xMinYMin meet">'
+            f'<g transform="matrix(1,0,0,-1,0,{ymax + ymin})">'
+            f"{self.svg(scale_factor)}</g></svg>"
+        )
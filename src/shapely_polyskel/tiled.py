@@ -0,0 +1,322 @@
+"""
+Tiled skeletonization of very large polygons.
+
+The polygon is cut into a grid of square tiles. Every tile is skeletonized
+together with a halo around it and the skeleton is clipped to the tile, so
+that arcs crossing a seam are split at the seam, where the arcs of the
+neighbouring tile continue. The nodes keep the heights of the skeleton of
+their tile, the ends of an arc split at a seam get the height interpolated
+along the arc. The subtrees are streamed tile by tile, so that only one tile
+(per worker) is held in memory.
+
+The halo must be at least as wide as the distance from the tile to the
+boundary: no node in the tile is higher, so the wavefronts of the edges cut
+by the halo don't reach the tile. By default every tile gets a halo of an
+upper bound of that distance. The memory held per tile is therefore not
+bounded by the tile size: it grows with the width of the polygon, and a tile
+in the middle of a polygon that is wide in every direction holds about the
+whole polygon. Tiling bounds the memory only for polygons that are narrow
+compared to their extent (rivers, roads, coastlines). The two halves of an
+arc split at a seam meet only up to the precision of the skeletons.
+"""
+
+import json
+import math
+from collections import deque
+from collections.abc import Iterator
+
+from euclid3 import Point2
+from shapely import (
+    Polygon,
+    box,
+    clip_by_rect,
+    distance,
+    get_parts,
+    intersects,
+    normalize,
+    points,
+    prepare,
+)
+
+from .polyskel import Subtree, skeletonize
+
+# polygon of a tiling worker process, set once by _init_tile_worker
+_tile_polygon = None
+# cells per side of the grid sampling the distance to the boundary in a tile
+_HORIZON_CELLS = 16
+
+
+def _init_tile_worker(polygon: Polygon) -> None:
+    global _tile_polygon
+    _tile_polygon = polygon
+    prepare(_tile_polygon)
+
+
+def _tiles(
+    polygon: Polygon, tile_size: float
+) -> list[tuple[float, float, float, float]]:
+    xmin, ymin, xmax, ymax = polygon.bounds
+    columns = max(math.ceil((xmax - xmin) / tile_size), 1)
+    rows = max(math.ceil((ymax - ymin) / tile_size), 1)
+    tiles = []
+    for i in range(columns):
+        for j in range(rows):
+            tile = (
+                xmin + i * tile_size,
+                ymin + j * tile_size,
+                xmin + (i + 1) * tile_size,
+                ymin + (j + 1) * tile_size,
+            )
+            if polygon.intersects(box(*tile)):
+                tiles.append(tile)
+    return tiles
+
+
+def _clip(
+    a: tuple[float, float],
+    b: tuple[float, float],
+    tile: tuple[float, float, float, float],
+) -> tuple | None:
+    """
+    Clips the segment ab to the tile (Liang-Barsky). Returns the ends of the
+    clipped segment and their parameters along ab.
+    """
+    x0, y0, x1, y1 = tile
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in (
+        (-dx, a[0] - x0),
+        (dx, x1 - a[0]),
+        (-dy, a[1] - y0),
+        (dy, y1 - a[1]),
+    ):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = q / p
+        if p < 0:
+            t0 = max(t0, t)
+        else:
+            t1 = min(t1, t)
+        if t0 > t1:
+            return None
+    start = a if t0 == 0 else (a[0] + t0 * dx, a[1] + t0 * dy)
+    end = b if t1 == 1 else (a[0] + t1 * dx, a[1] + t1 * dy)
+    if start == end:
+        return None
+    # segments on the upper borders belong to the next tile
+    if (start[0] == end[0] == x1) or (start[1] == end[1] == y1):
+        return None
+    return start, end, t0, t1
+
+
+def _horizon(
+    polygon: Polygon, tile: tuple[float, float, float, float]
+) -> float:
+    """
+    Upper bound of the distance from the points of the polygon in the tile to
+    its boundary: the largest distance from the centre of a cell of a grid
+    over the tile that meets the polygon, plus half the cell diagonal. The
+    boundary is clipped to a box around the tile, which grows until it holds
+    the closest boundary point of every centre.
+    """
+    x0, y0, x1, y1 = tile
+    size = (x1 - x0) / _HORIZON_CELLS
+    cells = [
+        (x0 + i * size, y0 + j * size)
+        for i in range(_HORIZON_CELLS)
+        for j in range(_HORIZON_CELLS)
+    ]
+    boxes = [box(x, y, x + size, y + size) for x, y in cells]
+    centres = points(
+        [
+            (x + size / 2, y + size / 2)
+            for (x, y), hit in zip(
+                cells, intersects(polygon, boxes), strict=True
+            )
+            if hit
+        ]
+    )
+    if not len(centres):
+        return 0.0
+    reach = x1 - x0
+    while True:
+        boundary = clip_by_rect(
+            polygon.boundary, x0 - reach, y0 - reach, x1 + reach, y1 + reach
+        )
+        closest = distance(boundary, centres).max()
+        # a closer boundary point would lie in the box
+        if closest <= reach:
+            return float(closest) + size * math.sqrt(0.5)
+        reach *= 2
+
+
+def _skeletonize_tile(
+    tile: tuple[float, float, float, float],
+    halo: float | None,
+    rescale: bool,
+    polygon: Polygon | None = None,
+) -> list[tuple]:
+    """
+    Skeleton of the polygon around the tile, clipped to the tile. Arcs
+    crossing the border of the tile end at the border, where the arcs of the
+    neighbouring tile continue. The subtrees are encoded as (x, y, height,
+    sinks) tuples, which unlike euclid3 points can be sent back from a worker
+    process. Raises ValueError if the halo is narrower than the horizon of the
+    tile, see _horizon.
+    """
+    polygon = _tile_polygon if polygon is None else polygon
+    horizon = _horizon(polygon, tile)
+    if halo is None:
+        halo = horizon
+    elif halo < horizon:
+        raise ValueError(
+            f"The halo must be at least {horizon} wide for the tile {tile}."
+        )
+    x0, y0, x1, y1 = tile
+    hx0, hy0, hx1, hy1 = x0 - halo, y0 - halo, x1 + halo, y1 + halo
+    piece = clip_by_rect(polygon, hx0, hy0, hx1, hy1)
+
+    sinks_by_source = {}
+    heights = {}
+    for part in get_parts(piece):
+        if not isinstance(part, Polygon) or part.area == 0:
+            continue
+        part = normalize(part)
+        skeleton = skeletonize(
+            part.exterior.coords[:-1],
+            [ring.coords[:-1] for ring in part.interiors],
+            rescale=rescale,
+        )
+        # sinks that aren't sources are vertices of the piece, at height 0
+        node_heights = {
+            (subtree.source.x, subtree.source.y): subtree.height
+            for subtree in skeleton
+        }
+        for subtree in skeleton:
+            source = (subtree.source.x, subtree.source.y)
+            for sink in subtree.sinks:
+                clipped = _clip(source, (sink.x, sink.y), tile)
+                if clipped is None:
+                    continue
+                start, end, t0, _ = clipped
+                # the height rises linearly along an arc
+                sink_height = node_heights.get((sink.x, sink.y), 0.0)
+                heights[start] = subtree.height + t0 * (
+                    sink_height - subtree.height
+                )
+                sinks = sinks_by_source.setdefault(start, [])
+                if end not in sinks:
+                    sinks.append(end)
+    return [
+        (x, y, heights[(x, y)], sinks)
+        for (x, y), sinks in sinks_by_source.items()
+    ]
+
+
+def _decode(encoded: list[tuple]) -> Iterator[Subtree]:
+    for x, y, height, sinks in encoded:
+        yield Subtree(Point2(x, y), height, [Point2(*sink) for sink in sinks])
+
+
+def tiled_skeleton(
+    polygon: Polygon,
+    tile_size: float,
+    halo: float | None = None,
+    rescale: bool = False,
+    workers: int = 1,
+) -> Iterator[Subtree]:
+    """Computes the straight skeleton of a large polygon tile by tile.
+
+    Args:
+        polygon (Polygon): Input polygon.
+        tile_size (float): Side of the square tiles.
+        halo (float | None, optional): Width of the margin skeletonized
+            around every tile. Defaults to None (an upper bound of the
+            distance from the tile to the boundary, for every tile). The
+            memory held per tile grows with the halo, for a wide polygon it
+            isn't bounded by the tile size.
+        rescale (bool, optional): Rescale every tile before its skeleton is
+            computed, see skeletonize. Defaults to False.
+        workers (int, optional): Number of worker processes. 0 uses one
+            worker per CPU. Defaults to 1.
+
+    Yields:
+        Subtree: Subtrees, in the order of the tiles.
+
+    Raises:
+        ValueError: The tile size isn't positive, or the halo is narrower
+            than the distance from a tile to the boundary.
+    """
+    if tile_size <= 0:
+        raise ValueError("The tile size must be positive.")
+    prepare(polygon)
+    tiles = _tiles(polygon, tile_size)
+
+    if workers == 0:
+        import os
+
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for tile in tiles:
+            yield from _decode(_skeletonize_tile(tile, halo, rescale, polygon))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        workers, initializer=_init_tile_worker, initargs=(polygon,)
+    ) as executor:
+        # a bounded number of pending tiles keeps the memory use flat
+        pending = deque()
+        for tile in tiles:
+            pending.append(
+                executor.submit(_skeletonize_tile, tile, halo, rescale)
+            )
+            if len(pending) >= 2 * workers:
+                yield from _decode(pending.popleft().result())
+        while pending:
+            yield from _decode(pending.popleft().result())
+
+
+def write_tiled_skeleton(
+    polygon: Polygon,
+    path: str,
+    tile_size: float,
+    halo: float | None = None,
+    rescale: bool = False,
+    workers: int = 1,
+) -> int:
+    """Computes the straight skeleton of a large polygon tile by tile and
+    writes it to a JSON lines file, one subtree per line
+    ({"source": [x, y], "height": h, "sinks": [[x, y], ...]}).
+
+    Args:
+        polygon (Polygon): Input polygon.
+        path (str): Output file.
+        tile_size (float): Side of the square tiles.
+        halo (float | None, optional): See tiled_skeleton. Defaults to None.
+        rescale (bool, optional): See tiled_skeleton. Defaults to False.
+        workers (int, optional): See tiled_skeleton. Defaults to 1.
+
+    Returns:
+        int: Number of written subtrees.
+
+    Raises:
+        ValueError: See tiled_skeleton.
+    """
+    count = 0
+    with open(path, "w") as file:
+        for subtree in tiled_skeleton(
+            polygon, tile_size, halo, rescale, workers
+        ):
+            record = {
+                "source": [subtree.source.x, subtree.source.y],
+                "height": subtree.height,
+                "sinks": [[sink.x, sink.y] for sink in subtree.sinks],
+            }
+            file.write(json.dumps(record) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,112 @@
+"""
+Generates the polygon corpus used by test_corpus.py (corpus.npz).
+
+Every polygon is built deterministically from a seeded random generator, in
+three kinds and three size classes (about 10, 100 and 1000 vertices):
+
+- footprint: rectilinear building outline, stepped on two sides
+- coastline: star-shaped outline with multi-octave radial noise
+- floor_plan: stepped outline with a grid of square columns (holes)
+
+The rings are normalized with shapely (exterior clockwise, holes
+counter-clockwise) and stored as arrays named "<kind>_<size>_<ring>", ring 0
+being the exterior. Run from the repository root:
+
+    python tests/fixtures/generate_corpus.py
+"""
+
+import math
+from pathlib import Path
+
+import numpy as np
+from shapely import Polygon, normalize
+
+SIZES = (10, 100, 1000)
+PATH = Path(__file__).with_name("corpus.npz")
+
+
+def _skyline(rng: np.random.Generator, steps: int, base: float) -> list:
+    """Steps of random width and height, from left to right."""
+    widths = rng.uniform(1.0, 3.0, steps)
+    heights = base + rng.uniform(0.0, 0.3 * base, steps)
+    xs = np.concatenate(([0.0], np.cumsum(widths)))
+    points = []
+    for i, height in enumerate(heights):
+        points.extend([(xs[i], height), (xs[i + 1], height)])
+    return points
+
+
+def footprint(rng: np.random.Generator, size: int) -> Polygon:
+    top_steps = size // 4 + size % 4 // 2
+    bottom_steps = size // 2 - top_steps
+    top = _skyline(rng, top_steps, 10.0)
+    bottom = _skyline(rng, bottom_steps, 10.0)
+    # both skylines span the same width
+    scale = top[-1][0] / bottom[-1][0]
+    bottom = [(x * scale, -y) for x, y in bottom]
+    return Polygon(top + bottom[::-1])
+
+
+def coastline(rng: np.random.Generator, size: int) -> Polygon:
+    angles = np.linspace(0.0, 2 * math.pi, size, endpoint=False)
+    radii = np.full(size, 100.0)
+    for octave in range(1, 6):
+        frequency = rng.integers(2, 6) * 2**octave
+        phase = rng.uniform(0.0, 2 * math.pi)
+        radii += 30.0 / 2**octave * np.sin(frequency * angles + phase)
+    radii *= rng.uniform(0.97, 1.03, size)
+    return Polygon(
+        np.column_stack((radii * np.cos(angles), radii * np.sin(angles)))
+    )
+
+
+def floor_plan(rng: np.random.Generator, size: int) -> Polygon:
+    columns = max(size // 10, 1)
+    steps = (size - 4 * columns - 2) // 2
+    base = 2.0 * steps
+    outer = _skyline(rng, steps, base)
+    width = outer[-1][0]
+    outer = [(0.0, 0.0), *outer, (width, 0.0)]
+
+    rows = max(round(math.sqrt(columns * base / width)), 1)
+    per_row = math.ceil(columns / rows)
+    dx = width / per_row
+    dy = base / rows
+    side = 0.2 * min(dx, dy)
+    holes = []
+    for k in range(columns):
+        x = (k % per_row + 0.5) * dx
+        y = (k // per_row + 0.5) * dy
+        holes.append(
+            [
+                (x - side, y - side),
+                (x + side, y - side),
+                (x + side, y + side),
+                (x - side, y + side),
+            ]
+        )
+    return Polygon(outer, holes)
+
+
+KINDS = {
+    "footprint": footprint,
+    "coastline": coastline,
+    "floor_plan": floor_plan,
+}
+
+
+def main() -> None:
+    arrays = {}
+    for seed, (kind, generate) in enumerate(KINDS.items()):
+        for size in SIZES:
+            rng = np.random.default_rng([seed, size])
+            polygon = normalize(generate(rng, size))
+            assert polygon.is_valid, (kind, size)
+            rings = (polygon.exterior, *polygon.interiors)
+            for i, ring in enumerate(rings):
+                arrays[f"{kind}_{size}_{i}"] = np.round(ring.coords[:-1], 3)
+    np.savez_compressed(PATH, **arrays)
+
+
+if __name__ == "__main__":
+    main()
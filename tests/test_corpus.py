@@ -0,0 +1,165 @@
+# Correctness invariants and time/memory budgets on the generated polygon
+# corpus (tests/fixtures/generate_corpus.py). The 1k vertex class is slow,
+# run it with: pytest --run-slow.
+
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytest
+from shapely import LineString, Polygon
+from shapely_polyskel import StraightSkeleton, roof_mesh, skeletonize
+from shapely_polyskel.polyskel import EPSILON
+
+CORPUS = np.load(Path(__file__).parent / "fixtures" / "corpus.npz")
+KINDS = ("footprint", "coastline", "floor_plan")
+
+# time budgets (s) per size class
+TIME_BUDGETS = {10: 1, 100: 5, 1000: 120}
+# peak memory budgets (MB, traced by tracemalloc) per size class
+MEMORY_BUDGETS = {10: 1, 100: 5, 1000: 50}
+
+
+# a vertex created by an edge event whose corner turns by more than a half
+# turn can meet an event below its own height
+UPWARD_ARCS = {
+    ("coastline", size): [
+        pytest.mark.skip(
+            reason="a degenerate vertex meets an event below its height, the "
+            "skeleton has arcs going up",
+        )
+    ]
+    for size in (100, 1000)
+}
+
+
+def _marks(size: int) -> list:
+    marks = []
+    if size >= 1000:
+        marks.append(pytest.mark.slow)
+    return marks
+
+
+def _cases(sizes: tuple[int, ...], marks: dict | None = None) -> list:
+    marks = marks or {}
+    return [
+        pytest.param(
+            kind,
+            size,
+            marks=_marks(size) + marks.get((kind, size), []),
+            id=f"{kind}-{size}",
+        )
+        for kind in KINDS
+        for size in sizes
+    ]
+
+
+def _rings(kind: str, size: int) -> list[list[tuple[float, float]]]:
+    rings = []
+    while f"{kind}_{size}_{len(rings)}" in CORPUS:
+        array = CORPUS[f"{kind}_{size}_{len(rings)}"]
+        rings.append([tuple(point) for point in array.tolist()])
+    return rings
+
+
+def _check_invariants(rings: list, skeleton: list) -> None:
+    vertices = {point for ring in rings for point in ring}
+    xs = [x for x, _ in vertices]
+    ys = [y for _, y in vertices]
+    tolerance = max(max(xs) - min(xs), max(ys) - min(ys)) * EPSILON
+
+    cover = Polygon(rings[0], rings[1:]).buffer(tolerance)
+    heights = {(st.source.x, st.source.y): st.height for st in skeleton}
+    for subtree in skeleton:
+        # every node ends arcs
+        assert subtree.sinks
+        for sink in subtree.sinks:
+            sink = (sink.x, sink.y)
+            # every arc is inside the polygon
+            arc = LineString([(subtree.source.x, subtree.source.y), sink])
+            assert cover.covers(arc)
+            # every sink is a polygon vertex or a source
+            assert sink in vertices or sink in heights
+            # heights don't increase along the ridges
+            if sink in heights:
+                assert heights[sink] <= subtree.height + tolerance
+
+
+@pytest.mark.parametrize("kind, size", _cases((10, 100, 1000), UPWARD_ARCS))
+def test_skeletonize(kind, size):
+    rings = _rings(kind, size)
+    assert sum(map(len, rings)) == size
+
+    # raises SkeletonBudgetExceeded when over the budget
+    skeleton = skeletonize(rings[0], rings[1:], timeout=TIME_BUDGETS[size])
+    _check_invariants(rings, skeleton)
+
+
+@pytest.mark.parametrize("kind, size", _cases((10, 100, 1000)))
+def test_memory(kind, size):
+    rings = _rings(kind, size)
+    tracemalloc.start()
+    try:
+        skeletonize(rings[0], rings[1:])
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+    assert peak < MEMORY_BUDGETS[size]
+
+
+@pytest.mark.parametrize("kind, size", _cases((10, 100, 1000), UPWARD_ARCS))
+def test_straight_skeleton(kind, size):
+    rings = _rings(kind, size)
+    straight_skeleton = StraightSkeleton(Polygon(rings[0], rings[1:]))
+    polygon = straight_skeleton.polygon
+    _check_invariants(
+        [ring.coords[:-1] for ring in (polygon.exterior, *polygon.interiors)],
+        straight_skeleton.straight_skeleton,
+    )
+
+
+@pytest.mark.parametrize(
+    "kind, size",
+    _cases(
+        (10, 100, 1000),
+        {
+            ("coastline", 1000): [
+                pytest.mark.skip(
+                    reason="the skeleton has crossing arcs, some of its faces "
+                    "don't close",
+                )
+            ]
+        },
+    ),
+)
+def test_roof_mesh(kind, size):
+    rings = _rings(kind, size)
+    mesh = roof_mesh(rings[0], rings[1:], triangulate=True)
+    assert mesh.failed == []
+    assert len(mesh.faces) >= size
+    area = sum(
+        Polygon([mesh.vertices[i][:2] for i in face]).area
+        for face in mesh.faces
+    )
+    assert area == pytest.approx(Polygon(rings[0], rings[1:]).area)
+
+
+@pytest.mark.parametrize("tolerance", [1, 3])
+@pytest.mark.parametrize("kind, size", _cases((10, 100)))
+def test_refine(kind, size, tolerance):
+    rings = _rings(kind, size)
+    polygon = Polygon(rings[0], rings[1:])
+    skeleton = StraightSkeleton(polygon, lod_tolerance=tolerance)
+    refined = StraightSkeleton(polygon, lod_tolerance=tolerance, refine=True)
+
+    arcs = {
+        (tuple(subtree.source), tuple(sink))
+        for subtree in skeleton.straight_skeleton
+        for sink in subtree.sinks
+    }
+    cover = polygon.buffer(EPSILON)
+    for subtree in refined.straight_skeleton:
+        for sink in subtree.sinks:
+            arc = (tuple(subtree.source), tuple(sink))
+            # the sinks of dropped vertices stay inside the polygon
+            assert arc in arcs or cover.covers(LineString(arc))
@@ -2,9 +2,37 @@
 # TODO Add real tests !!!
 # TODO Add speed tests
 
+import json
+import math
+import subprocess
+import sys
+import time
+
+import numpy as np
 import pytest
-from shapely import Polygon
-from shapely_polyskel import StraightSkeleton
+from euclid3 import Point2
+from shapely import (
+    LineString,
+    MultiLineString,
+    Polygon,
+    box,
+    hausdorff_distance,
+    unary_union,
+)
+from shapely_polyskel import (
+    SkeletonBudgetExceeded,
+    SkeletonCorrupted,
+    StraightSkeleton,
+    canonicalize,
+    fingerprint,
+    polyskel,
+    roof_mesh,
+    skeletonize,
+    tiled_skeleton,
+    write_tiled_skeleton,
+)
+from shapely_polyskel.polyskel import Subtree
+from shapely_polyskel.predicates import cross, orient2d, side
 
 init_data = [
     {  # florida
@@ -269,3 +297,603 @@ def test_validation(polygon, holes, expected):
         assert True == expected
     except TypeError:
         assert False == expected
+
+
+def test_predicates():
+    # c is to the right of ab, the rounded differences say otherwise
+    a = (0.17300740157905092, 0.548798761388153)
+    b = (1674485.8305023273, 1374703.0205016402)
+    c = (1177231.845720604, 966472.4221182604)
+    assert cross(b[0] - a[0], b[1] - a[1], c[0] - a[0], c[1] - a[1]) > 0
+    assert orient2d(a, b, c) < 0
+    assert orient2d(a, c, b) > 0
+    assert orient2d(a, b, b) == 0
+
+    origin, point = Point2(*a), Point2(*c)
+    direction = Point2(*b) - origin
+    assert side(origin, direction, point, 0) == -1
+    assert side(origin, direction, point, 1e-9) == 0
+
+
+def test_source_index():
+    # sources further apart than the tolerance in the same cell
+    index = polyskel._SourceIndex(1.0)
+    for x, y in ((0.05, 0.05), (0.95, 0.95), (0, 0)):
+        index.add(Subtree(Point2(x, y), 1.0, []))
+    assert len(index.subtrees()) == 2
+    assert index.find(Point2(0.05, 0.05)) == 0
+    assert index.find(Point2(0.9, 0.9)) == 1
+
+
+def test_merge_sources():
+    dodecagon = [
+        (
+            100 * math.cos(-2 * math.pi * i / 12),
+            100 * math.sin(-2 * math.pi * i / 12),
+        )
+        for i in range(12)
+    ]
+    skeleton = skeletonize(dodecagon)
+    assert len(skeleton) == 1
+    assert len(skeleton[0].sinks) == 12
+
+    exact = skeletonize(dodecagon, merge_tolerance=0)
+    assert len(exact) > 1
+
+
+@pytest.mark.parametrize(
+    "polygon, holes",
+    [
+        (test["polygon"], test["holes"])
+        for test in init_data
+        if test["expected"]
+    ],
+)
+def test_projected_coordinates(polygon, holes):
+    offset = 1e6
+
+    def translate(contour):
+        return [(x + offset, y + offset) for (x, y) in contour]
+
+    def summary(skeleton, offset=0.0):
+        return sorted(
+            (
+                round(subtree.source.x - offset, 2),
+                round(subtree.source.y - offset, 2),
+                round(subtree.height, 2),
+                len(subtree.sinks),
+            )
+            for subtree in skeleton
+        )
+
+    expected = summary(skeletonize(polygon, holes))
+    translated = skeletonize(
+        translate(polygon),
+        [translate(hole) for hole in holes] if holes else None,
+    )
+    assert summary(translated, offset) == expected
+
+
+@pytest.mark.parametrize(
+    "polygon, holes",
+    [
+        (test["polygon"], test["holes"])
+        for test in init_data
+        if test["expected"]
+    ],
+)
+def test_rescale(polygon, holes):
+    offset = (500000.0, 4000000.0)
+
+    def translate(contour):
+        return [(x + offset[0], y + offset[1]) for (x, y) in contour]
+
+    polygon = translate(polygon)
+    holes = [translate(hole) for hole in holes] if holes else []
+    skeleton = skeletonize(polygon, holes, rescale=True)
+
+    vertices = set(polygon).union(*holes)
+    sources = {(subtree.source.x, subtree.source.y) for subtree in skeleton}
+    for subtree in skeleton:
+        assert subtree.height > 0
+        for sink in subtree.sinks:
+            assert (sink.x, sink.y) in vertices | sources
+
+
+def test_budgets():
+    polygon = init_data[0]["polygon"]
+    with pytest.raises(SkeletonBudgetExceeded) as e:
+        skeletonize(polygon, max_events=10)
+    assert e.value.reason == "max_events"
+    assert 0 < len(e.value.skeleton) <= 10
+
+    with pytest.raises(SkeletonBudgetExceeded) as e:
+        skeletonize(polygon, max_queue_size=10)
+    assert e.value.reason == "max_queue_size"
+
+    with pytest.raises(SkeletonBudgetExceeded):
+        StraightSkeleton(Polygon(polygon), max_events=10)
+
+    straight_skeleton = StraightSkeleton(
+        Polygon(polygon), max_events=60, fallback_tolerance=20
+    )
+    assert straight_skeleton.is_fallback
+    assert straight_skeleton.straight_skeleton
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_seeding_timeout(workers):
+    # a star whose inner vertices are all reflex, the split event scan alone
+    # takes far longer than the timeout
+    star = [
+        (
+            (100 if i % 2 else 60) * math.cos(2 * math.pi * i / 4000),
+            (100 if i % 2 else 60) * math.sin(2 * math.pi * i / 4000),
+        )
+        for i in range(4000)
+    ]
+    start = time.perf_counter()
+    with pytest.raises(SkeletonBudgetExceeded) as e:
+        skeletonize(star, timeout=0.05, workers=workers)
+    assert e.value.reason == "timeout"
+    assert time.perf_counter() - start < 2
+
+
+def test_unclosed_lav():
+    # a reflex vertex used to split its own edge, corrupting its LAV
+    polygon = Polygon(
+        [
+            (-0.227, 199.617),
+            (200, 200),
+            (200, 100),
+            (120, 100),
+            (120, 60),
+            (200, 60),
+            (200, 0),
+            (0, 0),
+            (0, 100),
+            (80, 100),
+            (80, 140),
+            (0, 140),
+        ],
+        [
+            [
+                (119.067, 145.937),
+                (119.963, 144.386),
+                (121.753, 144.386),
+                (123.093, 145.326),
+                (121.753, 147.488),
+                (119.963, 147.488),
+            ],
+            [
+                (21.373, 90.953),
+                (22.223, 89.481),
+                (23.923, 89.481),
+                (24.773, 90.953),
+                (23.923, 92.426),
+                (21.889, 91.1),
+            ],
+        ],
+    ).normalize()
+    # used to hang regardless of the budgets
+    skeleton = skeletonize(
+        polygon.exterior.coords[:-1],
+        [ring.coords[:-1] for ring in polygon.interiors],
+        timeout=1.0,
+        max_events=10000,
+    )
+    assert len(skeleton) > 12
+    cover = polygon.buffer(1e-6)
+    for subtree in skeleton:
+        for sink in subtree.sinks:
+            arc = LineString([tuple(subtree.source), tuple(sink)])
+            assert cover.covers(arc)
+
+    # a chain that doesn't loop back to its head
+    vertices = polyskel._LAV.from_polygon(
+        [Point2(0, 0), Point2(1, 0), Point2(1, 1)], None
+    )
+    head = vertices.head
+    head.next.next.next = head.next
+    with pytest.raises(SkeletonCorrupted) as e:
+        polyskel._LAV.from_chain(head, None, 3)
+    assert not isinstance(e.value, SkeletonBudgetExceeded)
+
+
+def test_level_of_detail():
+    polygon = Polygon(
+        [
+            (
+                (100 + (i % 3)) * math.cos(2 * math.pi * i / 120),
+                (100 + (i % 3)) * math.sin(2 * math.pi * i / 120),
+            )
+            for i in range(120)
+        ]
+    )
+    straight_skeleton = StraightSkeleton(polygon, lod_tolerance=5, refine=True)
+    assert 0 < straight_skeleton.lod_error
+    assert len(straight_skeleton.skeleton_polygon.exterior.coords) < len(
+        straight_skeleton.polygon.exterior.coords
+    )
+
+    sinks = {
+        (sink.x, sink.y)
+        for subtree in straight_skeleton.straight_skeleton
+        for sink in subtree.sinks
+    }
+    assert set(straight_skeleton.polygon.exterior.coords) <= sinks
+
+    assert StraightSkeleton(polygon).lod_error == 0
+
+
+def test_parallel_seeding():
+    polygon = init_data[0]["polygon"]
+    expected = skeletonize(polygon)
+    skeleton = skeletonize(polygon, workers=2)
+    assert [(s.source, s.height, s.sinks) for s in skeleton] == [
+        (s.source, s.height, s.sinks) for s in expected
+    ]
+
+
+@pytest.mark.parametrize("n", [4, 6, 8, 24, 60])
+def test_concurrent_events(n):
+    regular_polygon = [
+        (
+            100 * math.cos(-2 * math.pi * i / n),
+            100 * math.sin(-2 * math.pi * i / n),
+        )
+        for i in range(n)
+    ]
+    skeleton = skeletonize(regular_polygon)
+    assert len(skeleton) == 1
+    assert len(skeleton[0].sinks) == n
+
+
+@pytest.mark.parametrize(
+    "polygon",
+    [
+        # reflex vertices of facing holes split each other's edges at once
+        Polygon(
+            box(0, 0, 58, 40).exterior,
+            [
+                box(48, 6, 54, 12).exterior,
+                box(48, 26, 54, 32).exterior,
+                box(36, 6, 42, 12).exterior,
+                box(36, 26, 42, 32).exterior,
+            ],
+        ),
+        # a row of holes splits the outer edges several times at once, the
+        # corridors along the edges collapse
+        Polygon(
+            box(0, 0, 181.066, 59.8).exterior,
+            [
+                box(x, 17.94, x + 23.92, 41.86).exterior
+                for x in (18.217, 78.573, 138.929)
+            ],
+        ),
+    ],
+)
+def test_degenerate_events(polygon):
+    polygon = polygon.normalize()
+    skeleton = skeletonize(
+        polygon.exterior.coords[:-1],
+        [ring.coords[:-1] for ring in polygon.interiors],
+    )
+    cover = polygon.buffer(1e-6)
+    for subtree in skeleton:
+        for sink in subtree.sinks:
+            arc = LineString([tuple(subtree.source), tuple(sink)])
+            assert cover.covers(arc)
+
+
+def test_update():
+    polygon = Polygon(init_data[0]["polygon"])
+    straight_skeleton = StraightSkeleton(polygon)
+    coords = straight_skeleton.polygon.exterior.coords
+    x, y = coords[10]
+    straight_skeleton.update({10: (x + 2, y - 1)})
+
+    expected = StraightSkeleton(straight_skeleton.polygon)
+    assert straight_skeleton.polygon.equals(expected.polygon)
+    assert [
+        (s.source, s.height, s.sinks)
+        for s in straight_skeleton.straight_skeleton
+    ] == [(s.source, s.height, s.sinks) for s in expected.straight_skeleton]
+
+    with pytest.raises(ValueError):
+        straight_skeleton.update({10: coords[20]})
+
+
+def test_roof_mesh():
+    rectangle = [(40, 40), (40, 310), (520, 310), (520, 40)]
+    mesh = roof_mesh(rectangle)
+    assert len(mesh.vertices) == 6
+    assert sorted(len(face) for face in mesh.faces) == [3, 3, 4, 4]
+    assert {z for (_, _, z) in mesh.vertices} == {0.0, 135.0}
+    assert mesh.failed == []
+
+
+def test_roof_mesh_failed_faces(monkeypatch):
+    rectangle = [(40, 40), (40, 310), (520, 310), (520, 40)]
+    straight_skeleton = StraightSkeleton(Polygon(rectangle))
+    # the faces were recorded with the skeleton, the event loop doesn't run
+    # again
+    monkeypatch.setattr("shapely_polyskel.shapely_polyskel._skeletonize", None)
+    mesh = straight_skeleton.roof_mesh()
+    assert len(mesh.faces) == 4
+    assert mesh.failed == []
+
+    # a face that doesn't close is reported, the others are kept
+    face_chain = polyskel._face_chain
+    monkeypatch.setattr(
+        polyskel,
+        "_face_chain",
+        lambda start, *args: (
+            None if start == (40, 40) else face_chain(start, *args)
+        ),
+    )
+    mesh = roof_mesh(rectangle, triangulate=True)
+    assert mesh.failed == [((40, 40), (40, 310))]
+    area = sum(
+        Polygon([mesh.vertices[i][:2] for i in face]).area
+        for face in mesh.faces
+    )
+    assert area == pytest.approx(Polygon(rectangle).area - 270 * 135 / 2)
+
+
+@pytest.mark.parametrize(
+    "polygon, holes",
+    [
+        (test["polygon"], test["holes"])
+        for test in init_data
+        if test["expected"]
+    ],
+)
+def test_roof_mesh_area(polygon, holes):
+    straight_skeleton = StraightSkeleton(Polygon(polygon, holes))
+    mesh = straight_skeleton.roof_mesh(triangulate=True)
+    assert all(len(face) == 3 for face in mesh.faces)
+    area = sum(
+        Polygon([mesh.vertices[i][:2] for i in face]).area
+        for face in mesh.faces
+    )
+    assert area == pytest.approx(straight_skeleton.polygon.area)
+
+
+def test_graph():
+    t_shape = Polygon(
+        [
+            (0, 0),
+            (100, 0),
+            (100, 10),
+            (60, 10),
+            (60, 40),
+            (40, 40),
+            (40, 10),
+            (0, 10),
+        ]
+    )
+    graph = StraightSkeleton(t_shape).graph()
+    indptr, indices = graph.csr()
+    assert len(indices) == 2 * len(graph.edges)
+    assert list(np.diff(indptr)) == list(graph.degrees())
+
+    merged = graph.merge_chains()
+    assert len(merged) == 4
+    branch = 40 + math.sqrt(50)
+    assert sorted(merged.lengths) == pytest.approx([20, branch, branch])
+
+    pruned = graph.prune(min_length=40)
+    assert len(pruned) == 2
+    assert pruned.lengths == pytest.approx([2 * branch])
+
+    # a junction of short branches keeps its longest branch
+    pruned = graph.prune(min_length=100)
+    assert pruned.lengths == pytest.approx([branch])
+
+    graph = StraightSkeleton(t_shape).graph(sinks=True)
+    assert len(graph) == 6 + 8
+    assert len(graph.prune(min_height=1).edges) == 3
+
+    plus = Polygon(
+        [
+            (-5, -50),
+            (5, -50),
+            (5, -5),
+            (50, -5),
+            (50, 5),
+            (5, 5),
+            (5, 50),
+            (-5, 50),
+            (-5, 5),
+            (-50, 5),
+            (-50, -5),
+            (-5, -5),
+        ]
+    )
+    pruned = StraightSkeleton(plus).graph().prune(min_length=100)
+    assert len(pruned) == 2
+    assert pruned.lengths == pytest.approx([45])
+
+
+def test_svg():
+    polygon = Polygon([(40, 40), (40, 310), (520, 310), (520, 40)])
+    straight_skeleton = StraightSkeleton(polygon)
+    svg = straight_skeleton.svg()
+    assert svg.count("<path") == 3
+    assert "#336699" in svg and "#999999" in svg
+    assert straight_skeleton.svg() == svg
+    assert "#ff0000" in straight_skeleton.svg(color="#ff0000")
+    assert straight_skeleton._repr_svg_().startswith("<svg")
+
+    straight_skeleton.update({2: (620, 310)})
+    assert "620" in straight_skeleton.svg()
+
+    straight_skeleton.svg_max_elements = 4
+    svg = straight_skeleton.svg()
+    assert svg.count(" L") == 3 + 4
+
+
+def test_lazy_imports():
+    # the core skeletonizer must not load shapely or numpy
+    code = (
+        "import sys\n"
+        "import shapely_polyskel\n"
+        "print(sorted({'shapely', 'numpy'} & set(sys.modules)))\n"
+        "shapely_polyskel.StraightSkeleton\n"
+        "print('shapely' in sys.modules)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split("\n")
+    assert output[:2] == ["[]", "True"]
+
+    # -X importtime reports the cumulative import time (us) of every module.
+    # The bound is generous, a regression that loads shapely or numpy again
+    # shows up in the module check above.
+    report = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import shapely_polyskel"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    cumulative = {
+        line.split("|")[2].strip(): int(line.split("|")[1])
+        for line in report.splitlines()[1:]
+        if line.startswith("import time:")
+    }
+    assert cumulative["shapely_polyskel"] < 500_000
+
+
+def test_hole_index(monkeypatch):
+    # a parcel with a grid of hexagonal columns
+    polygon = [(0, 0), (0, 600), (600, 600), (600, 0)]
+    holes = [
+        [
+            (
+                100 * i + 50 + (10 + i + j) * math.cos(math.pi * k / 3 + j),
+                100 * j + 50 + (10 + i + j) * math.sin(math.pi * k / 3 + j),
+            )
+            for k in range(6)
+        ]
+        for i in range(6)
+        for j in range(6)
+    ]
+
+    def canonical(skeleton):
+        return sorted(
+            (s.source.x, s.source.y, s.height, sorted(map(tuple, s.sinks)))
+            for s in skeleton
+        )
+
+    expected = canonical(skeletonize(polygon, holes))
+    monkeypatch.setattr(polyskel, "MIN_INDEXED_HOLE_EDGES", 10**9)
+    assert canonical(skeletonize(polygon, holes)) == expected
+
+
+def test_tiled_skeleton(tmp_path):
+    rectangle = Polygon([(0, 0), (0, 100), (1000, 100), (1000, 0)])
+    skeleton = list(tiled_skeleton(rectangle, 250, halo=200))
+    # the ridge is split at the seams of the tiles
+    assert [(st.source.x, st.source.y) for st in skeleton] == [
+        (50, 50),
+        (250, 50),
+        (500, 50),
+        (750, 50),
+        (950, 50),
+    ]
+    assert all(st.height == 50 for st in skeleton)
+
+    river = Polygon(
+        [(10 * i, 50 + 20 * math.sin(i / 10)) for i in range(100)]
+        + [(10 * i, -50 + 20 * math.sin(i / 10 + 1)) for i in range(99, -1, -1)]
+    )
+
+    def arcs(skeleton):
+        return unary_union(
+            MultiLineString(
+                [
+                    [(st.source.x, st.source.y), (sink.x, sink.y)]
+                    for st in skeleton
+                    for sink in st.sinks
+                ]
+            )
+        )
+
+    expected = arcs(StraightSkeleton(river).straight_skeleton)
+    path = tmp_path / "skeleton.jsonl"
+    count = write_tiled_skeleton(river, path, 300)
+    lines = path.read_text().splitlines()
+    assert count == len(lines)
+    skeleton = [
+        Subtree(
+            Point2(*record["source"]),
+            record["height"],
+            [Point2(*sink) for sink in record["sinks"]],
+        )
+        for record in map(json.loads, lines)
+    ]
+    assert hausdorff_distance(arcs(skeleton), expected) < 0.001
+
+    # wider than the tiles, the halos reach the boundary
+    square = Polygon([(0, 0), (0, 100), (100, 100), (100, 0)])
+    skeleton = list(tiled_skeleton(square, 25))
+    expected = arcs(StraightSkeleton(square).straight_skeleton)
+    assert hausdorff_distance(arcs(skeleton), expected) < 0.001
+    assert arcs(skeleton).length == pytest.approx(expected.length)
+    assert max(st.height for st in skeleton) == pytest.approx(50)
+    # the roof of a convex polygon is at the distance to the boundary, also
+    # at the seams
+    for st in skeleton:
+        x, y = st.source.x, st.source.y
+        assert st.height == pytest.approx(min(x, y, 100 - x, 100 - y))
+    with pytest.raises(ValueError):
+        list(tiled_skeleton(square, 25, halo=12.5))
+
+    # the nodes in the face of a reflex vertex keep their skeleton heights,
+    # which are above the distance to the boundary
+    polygon = Polygon(
+        [
+            (26.5, 0),
+            (38.8, 20.9),
+            (9.8, 68),
+            (-10.6, 18.2),
+            (-27.1, 21.6),
+            (-27.8, -21.3),
+            (-30.3, -45.6),
+            (5.8, -77.3),
+            (52, -32.8),
+        ]
+    )
+    heights = {
+        (round(st.source.x, 6), round(st.source.y, 6)): st.height
+        for st in StraightSkeleton(polygon).straight_skeleton
+    }
+    skeleton = list(tiled_skeleton(polygon, 1000))
+    assert len(skeleton) == len(heights)
+    for st in skeleton:
+        source = (round(st.source.x, 6), round(st.source.y, 6))
+        assert st.height == pytest.approx(heights[source])
+
+
+def test_fingerprint():
+    polygon, holes = init_data[0]["polygon"], init_data[0]["holes"]
+    skeleton = skeletonize(polygon, holes, canonical=True)
+    sources = [(st.source.x, st.source.y, st.height) for st in skeleton]
+    assert sources == sorted(sources)
+
+    shuffled = [
+        Subtree(st.source, st.height, st.sinks[::-1]) for st in skeleton[::-1]
+    ]
+    assert canonicalize(shuffled) == skeleton
+    assert fingerprint(shuffled) == fingerprint(skeleton)
+    assert fingerprint(skeletonize(polygon, holes, rescale=True)) == (
+        fingerprint(skeleton)
+    )
+    assert fingerprint(skeleton[1:]) != fingerprint(skeleton)
+
+    straight_skeleton = StraightSkeleton(Polygon(polygon, holes))
+    assert len(straight_skeleton.fingerprint()) == 32